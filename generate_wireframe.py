@@ -1,10 +1,32 @@
+import argparse
+import ast
+import calendar
+import collections
+import datetime
+import functools
+import hashlib
+import inspect
+import itertools
 import json
+import os
 import time
-import uuid
+import types
 import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from wireframe import board, charts
+from wireframe.layout import Center, Column, Grid, Leaf, Padding, Row
+from wireframe.library import Library
+from wireframe.lint import Linter
+from wireframe.render import Renderer
+from wireframe.text_metrics import fit_text, measure_text, measure_texts
+from wireframe.trace import Profiler, counted, traced, untraced
+from wireframe.transactions import aggregate, read_transactions, table_row
 
 # Configuration
 OUTPUT_FILE = "docs/diagrams/wireframe-expensestracker.excalidraw"
+CACHE_DIR = ".wireframe-cache" # Per-screen fragments for --incremental
 THEME = {
     "bg": "#ffffff",
     "container": "#f5f5f5",
@@ -13,59 +35,215 @@ THEME = {
     "brand": "#4f46e5",  # Indigo
     "success": "#10b981", # Green
     "danger": "#f43f5e",  # Red
-    "warning": "#f59e0b"  # Amber
+    "warning": "#f59e0b",  # Amber
+    "surface": "#ffffff", # Cards, inputs, modals
+    "subtle": "#f3f4f6",  # Header bar, badges, progress tracks
+    "border": "#e5e7eb",
+    "control": "#d1d5db", # Input borders
+    "muted": "#6b7280",   # Labels
+    "faint": "#9ca3af",   # Placeholders
+    "nav": "#4b5563",
+    "on_brand": "#ffffff",
+    "on_brand_muted": "#e0e7ff",
+    "overlay": "#000000",
+}
+
+# Variants for --themes; theme.json-style files can be given by path too
+THEMES = {
+    "light": THEME,
+    "dark": dict(THEME, bg="#111827", container="#1f2937", stroke="#4b5563", text="#f9fafb",
+                 brand="#818cf8", success="#34d399", danger="#fb7185", warning="#fbbf24",
+                 surface="#1f2937", subtle="#374151", border="#374151", control="#4b5563",
+                 muted="#9ca3af", faint="#6b7280", nav="#d1d5db"),
+    "brand": dict(THEME, brand="#0d9488", subtle="#f0fdfa", border="#ccfbf1", on_brand_muted="#ccfbf1",
+                  nav="#115e59"),
+}
+TOKEN = "theme:" # Color of a layout built for restyling, e.g. "theme:brand"
+TOKENS = False
+
+# Viewports for --viewports: (frame width, frame height, sidebar width,
+# account card columns, account card width). Tablet and mobile drop the sidebar.
+VIEWPORTS = {
+    "desktop": (1440, 900, 280, 3, 400),
+    "tablet": (768, 1024, 0, 2, 324),
+    "mobile": (390, 844, 0, 1, 310),
+}
+VIEWPORT = "desktop"
+FRAME_WIDTH, FRAME_HEIGHT, SIDEBAR_WIDTH, ACCOUNT_COLUMNS, CARD_WIDTH = VIEWPORTS[VIEWPORT]
+
+# Chart data shown when no export is given
+SPENDING_CATEGORIES = ["Groceries", "Rent", "Others"]
+MONTHLY = [ # (month, income, spent per category)
+    ("Jul", 4200, (610, 1400, 520)),
+    ("Aug", 4200, (580, 1400, 760)),
+    ("Sep", 4350, (640, 1400, 410)),
+    ("Oct", 4350, (700, 1400, 630)),
+    ("Nov", 4500, (560, 1400, 880)),
+    ("Dec", 4500, (720, 1400, 950)),
+]
+CHART_COLORS = ["#4f46e5", "#f43f5e", "#f59e0b", "#0ea5e9", "#a855f7", "#9ca3af"]
+
+font_family = 1 # 1: Virgil (hand), 2: Helvetica, 3: Cascadia (code)
+
+# Deterministic mode: ids derived from each element's place in the board,
+# seeded randomness and a fixed timestamp, so unchanged elements stay byte-identical
+DETERMINISTIC = False
+SEED = 0
+FIXED_TIMESTAMP = 1733270400000 # 2024-12-04T00:00:00Z
+
+rng = random.Random()
+_scope = ""
+_id_counts = collections.Counter()
+
+# Every element shares these base properties. Elements only store what
+# differs and are expanded into full Excalidraw dicts when serialized.
+ELEMENT_DEFAULTS = {
+    "type": None,
+    "version": 1,
+    "versionNonce": 0,
+    "isDeleted": False,
+    "id": None,
+    "fillStyle": "solid",
+    "strokeWidth": 1,
+    "strokeStyle": "solid",
+    "roughness": 0, # High fidelity, cleaner lines
+    "opacity": 100,
+    "angle": 0,
+    "x": 0,
+    "y": 0,
+    "width": 0,
+    "height": 0,
+    "strokeColor": None,
+    "backgroundColor": "transparent",
+    "groupIds": [],
+    "roundness": None,
+    "seed": 0,
+    "boundElements": [],
+    "updated": 0,
+    "link": None,
+    "locked": False,
 }
 
-SIDEBAR_WIDTH = 280
-
-elements = []
-font_family = 1 # 1: Sans, 2: Code, 3: Hand
-
-def get_id():
-    return str(uuid.uuid4())[:8]
-
-def create_element(type, x, y, w, h, **kwargs):
-    el = {
-        "type": type,
-        "version": 1,
-        "versionNonce": random.randint(0, 100000),
-        "isDeleted": False,
-        "id": get_id(),
-        "fillStyle": "solid",
-        "strokeWidth": 1,
-        "strokeStyle": "solid",
-        "roughness": 0, # High fidelity, cleaner lines
-        "opacity": 100,
-        "angle": 0,
-        "x": x,
-        "y": y,
-        "width": w,
-        "height": h,
-        "strokeColor": THEME["stroke"],
-        "backgroundColor": "transparent",
-        "groupIds": [],
-        "roundness": None,
-        "seed": random.randint(0, 100000),
-        "boundElements": [],
-        "updated": int(time.time() * 1000),
-        "link": None,
-        "locked": False,
-    }
-    el.update(kwargs)
-    return el
+class Element:
+    __slots__ = ("type", "id", "x", "y", "width", "height", "strokeColor", "backgroundColor",
+                 "groupIds", "roundness", "versionNonce", "seed", "updated", "props")
+    # Element.__init__ takes the slots positionally in this order (see __reduce__)
+
+    def __init__(self, type, id, x, y, width, height, strokeColor, backgroundColor="transparent",
+                 groupIds=(), roundness=None, versionNonce=0, seed=0, updated=0, props=None):
+        self.type = type
+        self.id = id
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.strokeColor = strokeColor
+        self.backgroundColor = backgroundColor
+        self.groupIds = groupIds
+        self.roundness = roundness
+        self.versionNonce = versionNonce
+        self.seed = seed
+        self.updated = updated
+        self.props = props # Type-specific or overridden properties (text, points, opacity...)
+
+    def __reduce__(self):
+        return Element, tuple(getattr(self, name) for name in Element.__slots__)
+
+    def get(self, key, default=None):
+        # dict-style lookup so tools can take records and loaded dicts alike
+        if key in Element.__slots__:
+            return getattr(self, key)
+        if self.props and key in self.props:
+            return self.props[key]
+        return ELEMENT_DEFAULTS.get(key, default)
+
+    @counted
+    def to_dict(self):
+        el = ELEMENT_DEFAULTS.copy()
+        el["type"] = self.type
+        el["versionNonce"] = self.versionNonce
+        el["id"] = self.id
+        el["x"] = self.x
+        el["y"] = self.y
+        el["width"] = self.width
+        el["height"] = self.height
+        el["strokeColor"] = self.strokeColor
+        el["backgroundColor"] = self.backgroundColor
+        el["groupIds"] = list(self.groupIds)
+        el["roundness"] = self.roundness
+        el["seed"] = self.seed
+        el["boundElements"] = []
+        el["updated"] = self.updated
+        if self.props:
+            el.update(self.props)
+        return el
+
+ROUNDED = {"type": 3} # Shared by every rounded element, never mutated
+
+def configure(deterministic=False, seed=0, viewport="desktop", tokens=False):
+    # With `tokens`, builders color elements with theme tokens instead of
+    # THEME's colors, so one layout can be restyled for every theme
+    global DETERMINISTIC, SEED, VIEWPORT, FRAME_WIDTH, FRAME_HEIGHT, SIDEBAR_WIDTH, ACCOUNT_COLUMNS, CARD_WIDTH
+    global TOKENS, THEME, HISTORY_PAGE_SIZE
+    DETERMINISTIC = deterministic
+    SEED = seed
+    VIEWPORT = viewport
+    FRAME_WIDTH, FRAME_HEIGHT, SIDEBAR_WIDTH, ACCOUNT_COLUMNS, CARD_WIDTH = VIEWPORTS[viewport]
+    HISTORY_PAGE_SIZE = (FRAME_HEIGHT - 335) // 60
+    TOKENS = tokens
+    THEME = {name: TOKEN + name for name in THEMES["light"]} if tokens else THEMES["light"]
+    clear_components() # Components are cached per viewport and palette
+
+def settings():
+    return {"deterministic": DETERMINISTIC, "seed": SEED, "viewport": VIEWPORT, "tokens": TOKENS}
+
+def begin_scope(path):
+    # Ids, nonces and seeds of everything built next derive from `path` in deterministic mode
+    global _scope
+    _scope = path
+    _id_counts.clear()
+    rng.seed(f"{SEED}:{path}" if DETERMINISTIC else None)
+
+@counted
+def get_id(type="", label=""):
+    if not DETERMINISTIC:
+        # Same 8 random hex digits as str(uuid.uuid4())[:8], without building a UUID
+        return os.urandom(4).hex()
+    # Counting per (type, label) keeps ids stable when unrelated elements are
+    # added before this one. Longer than random ids since collisions can't be retried.
+    key = (type, label)
+    _id_counts[key] += 1
+    return hashlib.sha1(f"{_scope}/{type}/{label}/{_id_counts[key]}".encode()).hexdigest()[:16]
 
+@counted
+def timestamp():
+    return FIXED_TIMESTAMP if DETERMINISTIC else int(time.time() * 1000)
+
+@counted
+def create_element(type, x, y, w, h, strokeColor=None, backgroundColor="transparent",
+                   groupIds=(), roundness=None, **kwargs):
+    return Element(type, get_id(type, kwargs.get("text", "")), x, y, w, h,
+                   strokeColor if strokeColor is not None else THEME["stroke"],
+                   backgroundColor, groupIds, roundness,
+                   versionNonce=rng.randint(0, 100000),
+                   seed=rng.randint(0, 100000),
+                   updated=timestamp(),
+                   props=kwargs or None)
+
+@counted
 def create_rect(x, y, w, h, fill=None, stroke=None, roundness=None, groupIds=[], **kwargs):
     return create_element("rectangle", x, y, w, h, 
                           backgroundColor=fill if fill else "transparent",
                           strokeColor=stroke if stroke else THEME["stroke"],
-                          roundness={"type": 3} if roundness else None,
+                          roundness=ROUNDED if roundness else None,
                           groupIds=groupIds,
                           **kwargs)
 
+@counted
 def create_text(x, y, text, size=20, align="left", color=None, width=None, groupIds=[]):
-    # Estimate width if not provided (rough calc)
-    w = width if width else len(text) * size * 0.6
-    h = size * 1.2
+    w, h = measure_text(text, size, font_family)
+    if width:
+        w = width
     return create_element("text", x, y, w, h,
                           text=text,
                           fontSize=size,
@@ -75,6 +253,7 @@ def create_text(x, y, text, size=20, align="left", color=None, width=None, group
                           strokeColor=color if color else THEME["text"],
                           groupIds=groupIds)
 
+@counted
 def create_ellipse(x, y, w, h, fill=None, stroke=None, groupIds=[], **kwargs):
     return create_element("ellipse", x, y, w, h,
                           backgroundColor=fill if fill else "transparent",
@@ -82,33 +261,162 @@ def create_ellipse(x, y, w, h, fill=None, stroke=None, groupIds=[], **kwargs):
                           groupIds=groupIds,
                           **kwargs)
 
+@counted
 def create_line(x, y, w, h, points, groupIds=[], **kwargs):
     return create_element("line", x, y, w, h, points=points, groupIds=groupIds, **kwargs)
 
 
+# --- Components ---
+
+class ElementView(Element):
+    # Translated copy of a component element. It owns its id, position and
+    # random fields and reads everything else from the shared base; writing
+    # any other field stores it on the view (copy-on-write).
+    __slots__ = ("base", "instance")
+
+    @counted
+    def __init__(self, base, x, y, instance=None):
+        self.base = base
+        self.instance = instance # (builder name, x, y) of the outermost component call that emitted it
+        self.id = get_id(base.type, base.get("text", ""))
+        self.x = x
+        self.y = y
+        self.versionNonce = rng.randint(0, 100000)
+        self.seed = rng.randint(0, 100000)
+        self.updated = timestamp()
+
+    def __getattr__(self, name):
+        # Only reached for slots the view hasn't set
+        if name in ("base", "instance") or name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.base, name)
+
+    def __reduce__(self):
+        # Pickle only what the view owns so fragments from pool workers share their bases
+        written = {}
+        for name in Element.__slots__:
+            if name in ("id", "x", "y"):
+                continue
+            try:
+                written[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        return _restore_view, (self.base, self.instance, self.id, self.x, self.y, written)
+
+def _restore_view(base, instance, id, x, y, written):
+    view = ElementView.__new__(ElementView)
+    view.base = base
+    view.instance = instance
+    view.id = id
+    view.x = x
+    view.y = y
+    for name, value in written.items():
+        setattr(view, name, value)
+    return view
+
+_components = collections.OrderedDict()
+COMPONENT_CACHE_SIZE = 256 # Paginated screens give every frame a new title; keep the hot ones
+
+def clear_components():
+    _components.clear()
+
+def _build_isolated(builder, args):
+    # Building a component's base must not use up the calling screen's ids or random draws
+    global _scope, _id_counts
+    saved = _scope, _id_counts, rng.getstate()
+    _scope, _id_counts = f"component:{builder.__name__}", collections.Counter()
+    try:
+        return list(builder(0, 0, *args))
+    finally:
+        _scope, _id_counts = saved[0], saved[1]
+        rng.setstate(saved[2])
+
+def component(builder):
+    # Builds `builder` once at the origin per set of extra arguments and replays
+    # it at (x, y) as translated views with fresh ids, instead of rebuilding it
+    @functools.wraps(builder)
+    def instance(x, y, *args):
+        key = (builder.__name__, repr(args))
+        base = _components.get(key)
+        if base is None:
+            base = _components[key] = _build_isolated(builder, args)
+            if len(_components) > COMPONENT_CACHE_SIZE:
+                _components.popitem(last=False)
+        else:
+            _components.move_to_end(key)
+        instance = (builder.__name__, x, y)
+        for el in base:
+            if isinstance(el, ElementView):
+                yield ElementView(el.base, el.x + x, el.y + y, instance)
+            else:
+                yield ElementView(el, el.x + x, el.y + y, instance)
+    return instance
+
+
+# --- Charts ---
+
+def money(value):
+    # Axis labels: $850, $1.5k, $12k, $1.2M
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    for limit, suffix in ((1e6, "M"), (1e3, "k")):
+        if value >= limit:
+            return f"{sign}${value / limit:.{1 if value < limit * 10 else 0}f}{suffix}"
+    return f"{sign}${value:.0f}"
+
+def daily_balance(months, start=datetime.date(2024, 7, 1)):
+    # [(day ordinal, balance)] for months without transactions: income lands
+    # on the 1st and each month's spending is spread evenly over its days
+    series = []
+    balance = 0
+    day = start
+    for _, income, spent in months:
+        days = calendar.monthrange(day.year, day.month)[1]
+        balance += income
+        for _ in range(days):
+            balance -= sum(spent) / days
+            series.append((day.toordinal(), round(balance, 2)))
+            day += datetime.timedelta(days=1)
+    return series
+
+
 # --- Builders ---
+# Frame sizes come from the viewport (FRAME_WIDTH, FRAME_HEIGHT, SIDEBAR_WIDTH...)
+# and colors from THEME, so the same builders draw every variant
 
-def build_screen_frame(x, y, title):
-    # Browser chrome
-    elements.append(create_rect(x, y, 1440, 900, fill="#ffffff"))
+@traced
+@component
+def build_browser_chrome(x, y):
+    # Window, header bar and URL bar: the same on every screen
+    yield create_rect(x, y, FRAME_WIDTH, FRAME_HEIGHT, fill=THEME["bg"])
     # Header bar
-    elements.append(create_rect(x, y, 1440, 60, fill="#f3f4f6", stroke="transparent"))
+    yield create_rect(x, y, FRAME_WIDTH, 60, fill=THEME["subtle"], stroke="transparent")
     # Window controls
-    elements.append(create_ellipse(x+20, y+20, 12, 12, fill="#ff5f56", stroke="transparent"))
-    elements.append(create_ellipse(x+40, y+20, 12, 12, fill="#ffbd2e", stroke="transparent"))
-    elements.append(create_ellipse(x+60, y+20, 12, 12, fill="#27c93f", stroke="transparent"))
+    yield create_ellipse(x+20, y+20, 12, 12, fill="#ff5f56", stroke="transparent")
+    yield create_ellipse(x+40, y+20, 12, 12, fill="#ffbd2e", stroke="transparent")
+    yield create_ellipse(x+60, y+20, 12, 12, fill="#27c93f", stroke="transparent")
     # URL Bar
-    elements.append(create_rect(x+100, y+10, 1200, 40, fill="#ffffff", roundness=True))
-    elements.append(create_text(x+120, y+20, f"https://expensestracker.app/{title.lower()}", size=16, color="#9ca3af"))
+    yield create_rect(x+100, y+10, FRAME_WIDTH - 240, 40, fill=THEME["surface"], roundness=True)
+
+@traced
+def build_screen_frame(x, y, title):
+    yield from build_browser_chrome(x, y)
+    url = fit_text(f"https://expensestracker.app/{title.lower()}", FRAME_WIDTH - 280, 16, font_family)
+    yield create_text(x+120, y+20, url, size=16, color=THEME["faint"])
 
+@traced
+@component
 def build_nav(x, y):
     # App Header inside page (now a sidebar)
+    if not SIDEBAR_WIDTH:
+        return # Narrow viewports have no sidebar
     sidebar_x = x
     sidebar_y = y + 60
-    elements.append(create_rect(sidebar_x, sidebar_y, SIDEBAR_WIDTH, 840, fill="#ffffff", stroke="#e5e7eb")) # Height 900-60
+    yield create_rect(sidebar_x, sidebar_y, SIDEBAR_WIDTH, FRAME_HEIGHT - 60, fill=THEME["surface"], stroke=THEME["border"])
     
     # Logo
-    elements.append(create_text(sidebar_x+40, sidebar_y+30, "ExpensesTracker", size=24, color=THEME["brand"]))
+    yield create_text(sidebar_x+40, sidebar_y+30, fit_text("ExpensesTracker", SIDEBAR_WIDTH - 50, 24, font_family),
+                      size=24, color=THEME["brand"])
     
     # Navigation Links
     links = [
@@ -122,342 +430,426 @@ def build_nav(x, y):
     
     link_y = sidebar_y + 120
     for link in links:
-        color = THEME["brand"] if link["name"] == "Dashboard" else "#4b5563"
-        elements.append(create_text(sidebar_x+40, link_y, f"{link['icon']} {link['name']}", size=18, color=color))
+        color = THEME["brand"] if link["name"] == "Dashboard" else THEME["nav"]
+        yield create_text(sidebar_x+40, link_y, f"{link['icon']} {link['name']}", size=18, color=color)
         link_y += 60
     
     # Profile placeholder at bottom
-    elements.append(create_ellipse(sidebar_x+40, sidebar_y+750, 40, 40, fill="#d1d5db"))
-    elements.append(create_text(sidebar_x+90, sidebar_y+760, "A. User", size=16, color="#4b5563"))
+    yield create_ellipse(sidebar_x+40, sidebar_y+FRAME_HEIGHT-150, 40, 40, fill=THEME["control"])
+    yield create_text(sidebar_x+90, sidebar_y+FRAME_HEIGHT-140, "A. User", size=16, color=THEME["nav"])
 
+@traced
 def build_login(start_x, start_y):
-    build_screen_frame(start_x, start_y, "login")
+    yield from build_screen_frame(start_x, start_y, "login")
     
     # Center Card
-    cx = start_x + 520
-    cy = start_y + 250
-    elements.append(create_rect(cx, cy, 400, 400, fill="#ffffff", roundness=True))
+    def card(cx, cy, card_w, card_h):
+        yield create_rect(cx, cy, card_w, card_h, fill=THEME["surface"], roundness=True)
     
-    elements.append(create_text(cx+130, cy+40, "Welcome Back", size=24))
+        yield create_text(cx+card_w//2-70, cy+40, "Welcome Back", size=24)
     
-    # Email
-    elements.append(create_text(cx+40, cy+100, "Email", size=14, color="#6b7280"))
-    elements.append(create_rect(cx+40, cy+125, 320, 40, fill="#ffffff", stroke="#d1d5db", roundness=True))
+        # Email
+        yield create_text(cx+40, cy+100, "Email", size=14, color=THEME["muted"])
+        yield create_rect(cx+40, cy+125, card_w-80, 40, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
     
-    # Password
-    elements.append(create_text(cx+40, cy+180, "Password", size=14, color="#6b7280"))
-    elements.append(create_rect(cx+40, cy+205, 320, 40, fill="#ffffff", stroke="#d1d5db", roundness=True))
+        # Password
+        yield create_text(cx+40, cy+180, "Password", size=14, color=THEME["muted"])
+        yield create_rect(cx+40, cy+205, card_w-80, 40, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
     
-    # Button
-    elements.append(create_rect(cx+40, cy+280, 320, 50, fill=THEME["brand"], stroke="transparent", roundness=True))
-    elements.append(create_text(cx+160, cy+295, "Sign In", size=16, color="#ffffff"))
+        # Button
+        yield create_rect(cx+40, cy+280, card_w-80, 50, fill=THEME["brand"], stroke="transparent", roundness=True)
+        yield create_text(cx+card_w//2-40, cy+295, "Sign In", size=16, color=THEME["on_brand"])
     
-    # Links
-    elements.append(create_text(cx+120, cy+350, "Don't have an account? Sign up", size=12, color=THEME["brand"]))
+        # Links
+        yield create_text(cx+card_w//2-80, cy+350, "Don't have an account? Sign up", size=12, color=THEME["brand"])
 
+    card = Leaf(min(400, FRAME_WIDTH - 40), 400, card)
+    yield from Center(card, FRAME_WIDTH, FRAME_HEIGHT, snap=True).place(start_x, start_y)
 
-def build_dashboard(start_x, start_y):
-    build_screen_frame(start_x, start_y, "dashboard")
-    build_nav(start_x, start_y)
+
+def summary_card(label, amount, color):
+    def draw(sx, sy, w, h):
+        yield create_rect(sx, sy, w, h, fill=THEME["surface"], stroke=THEME["border"], roundness=True)
+        yield create_text(sx+30, sy+30, label, size=14, color=THEME["muted"])
+        yield create_text(sx+30, sy+60, amount, size=28, color=color)
+    return Leaf(280, 180, draw)
+
+def account_card(acc):
+    def draw(cx, cy, w, h):
+        # Card
+        yield create_rect(cx, cy, w, h, fill=THEME["surface"], stroke=THEME["border"], roundness=True)
+        # Name
+        yield create_text(cx+20, cy+20, acc["name"], size=18)
+        # Balance
+        yield create_text(cx+20, cy+50, acc["bal"], size=32)
+        # Progress Bar BG
+        yield create_rect(cx+20, cy+110, w-40, 10, fill=THEME["subtle"], stroke="transparent", roundness=True)
+        # Progress Bar Fill
+        fill_w = (w-40) * (acc["pct"] / 100)
+        if fill_w > 0:
+            yield create_rect(cx+20, cy+110, fill_w, 10, fill=acc["color"], stroke="transparent", roundness=True)
+    return Leaf(CARD_WIDTH, 150, draw)
+
+@traced
+@component
+def build_dashboard(start_x, start_y, accounts=None, fold=True):
+    # fold=False draws every account card, even past the bottom of the frame
+    yield from build_screen_frame(start_x, start_y, "dashboard")
+    yield from build_nav(start_x, start_y)
     
     content_x_offset = SIDEBAR_WIDTH + 40 # Sidebar width + padding
+    content_right = start_x + FRAME_WIDTH - 40
     content_y = start_y + 100 # Adjusted for removed top navbar
+    bottom = start_y + FRAME_HEIGHT - 20
     
     # Hero Section
-    elements.append(create_text(start_x+content_x_offset, content_y, "Dashboard", size=32))
-    
-    # Safe to Spend Card
-    hx = start_x + content_x_offset
-    hy = content_y + 60
-    elements.append(create_rect(hx, hy, 400, 180, fill=THEME["brand"], stroke="transparent", roundness=True))
-    elements.append(create_text(hx+30, hy+30, "Safe to Spend", size=16, color="#e0e7ff"))
-    elements.append(create_text(hx+30, hy+70, "$1,250.00", size=48, color="#ffffff"))
-    elements.append(create_text(hx+30, hy+130, "Available across Spending Accounts", size=14, color="#e0e7ff"))
-    
-    # Summary Cards
-    sx = hx + 440
-    elements.append(create_rect(sx, hy, 280, 180, fill="#ffffff", stroke="#e5e7eb", roundness=True))
-    elements.append(create_text(sx+30, hy+30, "Income (Month)", size=14, color="#6b7280"))
-    elements.append(create_text(sx+30, hy+60, "$4,500.00", size=28, color=THEME["success"]))
-    
-    sx += 300
-    elements.append(create_rect(sx, hy, 280, 180, fill="#ffffff", stroke="#e5e7eb", roundness=True))
-    elements.append(create_text(sx+30, hy+30, "Spent (Month)", size=14, color="#6b7280"))
-    elements.append(create_text(sx+30, hy+60, "$2,150.00", size=28, color=THEME["danger"]))
+    yield create_text(start_x+content_x_offset, content_y, "Dashboard", size=32)
+    
+    # Safe to Spend card and the summary cards, wrapping below it on narrow viewports
+    content_w = content_right - (start_x + content_x_offset)
+    hero_w = min(400, content_w)
+    def hero(hx, hy, w, h):
+        yield create_rect(hx, hy, w, h, fill=THEME["brand"], stroke="transparent", roundness=True)
+        yield create_text(hx+30, hy+30, "Safe to Spend", size=16, color=THEME["on_brand_muted"])
+        yield create_text(hx+30, hy+70, "$1,250.00", size=48, color=THEME["on_brand"])
+        yield create_text(hx+30, hy+130, "Available across Spending Accounts", size=14, color=THEME["on_brand_muted"])
+    summary = Row([Padding(Leaf(hero_w, 180, hero), (0, 20, 0, 0)),
+                   summary_card("Income (Month)", "$4,500.00", THEME["success"]),
+                   summary_card("Spent (Month)", "$2,150.00", THEME["danger"])],
+                  gap=20, wrap=True, row_gap=20)
+    yield from summary.place(start_x + content_x_offset, content_y + 60, content_w)
 
     # Accounts Grid
-    cy = hy + 220
-    elements.append(create_text(start_x+content_x_offset, cy, "Your Accounts", size=24))
-    
-    accounts = [
-        {"name": "Daily Spending", "bal": "$320.00", "pct": 60, "color": THEME["success"]},
-        {"name": "Bills Account", "bal": "$1,100.00", "pct": 90, "color": THEME["success"]},
-        {"name": "Savings", "bal": "$5,000.00", "pct": 100, "color": THEME["success"]},
-        {"name": "Emergency Fund", "bal": "$2,000.00", "pct": 100, "color": THEME["success"]},
-        {"name": "Travel Fund", "bal": "$450.00", "pct": 30, "color": THEME["warning"]},
-        {"name": "Tech Upgrade", "bal": "$1,200.00", "pct": 80, "color": THEME["success"]},
-    ]
-    
-    grid_x_start = start_x + content_x_offset
+    cy = content_y + 60 + summary.size(content_w)[1] + 40
     grid_y = cy + 50
-    col = 0
     
-    for acc in accounts:
-        if col > 2: # 3 columns
-            col = 0
-            grid_y += 180
-        
-        cx = grid_x_start + (col * 440)
-        
-        # Card
-        elements.append(create_rect(cx, grid_y, 400, 150, fill="#ffffff", stroke="#e5e7eb", roundness=True))
-        # Name
-        elements.append(create_text(cx+20, grid_y+20, acc["name"], size=18))
-        # Balance
-        elements.append(create_text(cx+20, grid_y+50, acc["bal"], size=32))
-        # Progress Bar BG
-        elements.append(create_rect(cx+20, grid_y+110, 360, 10, fill="#f3f4f6", stroke="transparent", roundness=True))
-        # Progress Bar Fill
-        fill_w = 360 * (acc["pct"] / 100)
-        if fill_w > 0:
-            elements.append(create_rect(cx+20, grid_y+110, fill_w, 10, fill=acc["color"], stroke="transparent", roundness=True))
-            
-        col += 1
+    if accounts is None:
+        accounts = [
+            {"name": "Daily Spending", "bal": "$320.00", "pct": 60, "color": THEME["success"]},
+            {"name": "Bills Account", "bal": "$1,100.00", "pct": 90, "color": THEME["success"]},
+            {"name": "Savings", "bal": "$5,000.00", "pct": 100, "color": THEME["success"]},
+            {"name": "Emergency Fund", "bal": "$2,000.00", "pct": 100, "color": THEME["success"]},
+            {"name": "Travel Fund", "bal": "$450.00", "pct": 30, "color": THEME["warning"]},
+            {"name": "Tech Upgrade", "bal": "$1,200.00", "pct": 80, "color": THEME["success"]},
+        ]
+    
+    visible = accounts
+    if fold:
+        rows = max(0, (bottom - grid_y + 30) // 180) # The rest is below the fold
+        visible = accounts[:rows * ACCOUNT_COLUMNS]
+    if visible:
+        yield create_text(start_x+content_x_offset, cy, "Your Accounts", size=24)
+        grid = Grid([account_card(acc) for acc in visible], ACCOUNT_COLUMNS, gap=(40, 30))
+        yield from grid.place(start_x + content_x_offset, grid_y)
 
     # Floating Action Buttons (Simulated at bottom right, adjusted for sidebar)
-    fab_x = start_x + 1300
-    fab_y = start_y + 800
+    fab_x = start_x + FRAME_WIDTH - 140
+    fab_y = start_y + FRAME_HEIGHT - 100
     
     # Add Expense (Red)
-    elements.append(create_ellipse(fab_x, fab_y, 60, 60, fill=THEME["danger"], stroke="transparent"))
-    elements.append(create_text(fab_x+18, fab_y+10, "-", size=40, color="#ffffff"))
+    yield create_ellipse(fab_x, fab_y, 60, 60, fill=THEME["danger"], stroke="transparent")
+    yield create_text(fab_x+18, fab_y+10, "-", size=40, color=THEME["on_brand"])
     
     # Add Income (Green)
-    elements.append(create_ellipse(fab_x, fab_y-80, 60, 60, fill=THEME["success"], stroke="transparent"))
-    elements.append(create_text(fab_x+15, fab_y-90, "+", size=40, color="#ffffff"))
+    yield create_ellipse(fab_x, fab_y-80, 60, 60, fill=THEME["success"], stroke="transparent")
+    yield create_text(fab_x+15, fab_y-90, "+", size=40, color=THEME["on_brand"])
 
 
+@traced
 def build_add_expense(start_x, start_y):
     # Background (Blurred/Dimmed Dashboard)
-    build_dashboard(start_x, start_y) # This will now build with sidebar
+    yield from build_dashboard(start_x, start_y) # This will now build with sidebar
     # Overlay (adjusted to start after sidebar)
-    elements.append(create_rect(start_x + SIDEBAR_WIDTH, start_y + 60, 1440 - SIDEBAR_WIDTH, 840, fill="#000000", stroke="transparent", opacity=50))
+    yield create_rect(start_x + SIDEBAR_WIDTH, start_y + 60, FRAME_WIDTH - SIDEBAR_WIDTH, FRAME_HEIGHT - 60,
+                      fill=THEME["overlay"], stroke="transparent", opacity=50)
     
     # Modal (Larger height for extra field)
-    modal_width = 500
+    modal_width = min(500, FRAME_WIDTH - SIDEBAR_WIDTH - 40)
     modal_height = 700
+    field_w = modal_width - 80
+    button_w = (modal_width - 100) // 2
     
-    mx = start_x + SIDEBAR_WIDTH + ((1440 - SIDEBAR_WIDTH) - modal_width) / 2
-    my = start_y + 60 + (840 - modal_height) / 2
-    
-    elements.append(create_rect(mx, my, modal_width, modal_height, fill="#ffffff", roundness=True))
+    def modal(mx, my, modal_width, modal_height):
+        yield create_rect(mx, my, modal_width, modal_height, fill=THEME["surface"], roundness=True)
     
-    elements.append(create_text(mx+40, my+40, "Log Expense", size=24))
+        yield create_text(mx+40, my+40, "Log Expense", size=24)
     
-    # Amount
-    elements.append(create_text(mx+40, my+90, "Amount", size=14, color="#6b7280"))
-    elements.append(create_rect(mx+40, my+115, 420, 60, fill="#ffffff", stroke="#d1d5db", roundness=True))
-    elements.append(create_text(mx+60, my+130, "$ 45.00", size=32))
+        # Amount
+        yield create_text(mx+40, my+90, "Amount", size=14, color=THEME["muted"])
+        yield create_rect(mx+40, my+115, field_w, 60, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+        yield create_text(mx+60, my+130, "$ 45.00", size=32)
     
-    # Payment Account (Source)
-    elements.append(create_text(mx+40, my+200, "Payment Account", size=14, color="#6b7280"))
-    elements.append(create_rect(mx+40, my+225, 420, 50, fill="#ffffff", stroke="#d1d5db", roundness=True))
-    elements.append(create_text(mx+60, my+240, "Daily Spending", size=16))
-    elements.append(create_text(mx+300, my+240, "Avail: $320.00", size=14, color=THEME["success"])) 
+        # Payment Account (Source)
+        yield create_text(mx+40, my+200, "Payment Account", size=14, color=THEME["muted"])
+        yield create_rect(mx+40, my+225, field_w, 50, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+        yield create_text(mx+60, my+240, "Daily Spending", size=16)
+        yield create_text(mx+modal_width-200, my+240, "Avail: $320.00", size=14, color=THEME["success"]) 
     
-    # Expense Category (Classification)
-    elements.append(create_text(mx+40, my+300, "Expense Category", size=14, color="#6b7280"))
-    elements.append(create_rect(mx+40, my+325, 420, 50, fill="#ffffff", stroke="#d1d5db", roundness=True))
-    elements.append(create_text(mx+60, my+340, "Dining Out", size=16))
+        # Expense Category (Classification)
+        yield create_text(mx+40, my+300, "Expense Category", size=14, color=THEME["muted"])
+        yield create_rect(mx+40, my+325, field_w, 50, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+        yield create_text(mx+60, my+340, "Dining Out", size=16)
     
-    # Description
-    elements.append(create_text(mx+40, my+400, "Description", size=14, color="#6b7280"))
-    elements.append(create_rect(mx+40, my+425, 420, 50, fill="#ffffff", stroke="#d1d5db", roundness=True))
-    elements.append(create_text(mx+60, my+440, "Lunch with team", size=16))
+        # Description
+        yield create_text(mx+40, my+400, "Description", size=14, color=THEME["muted"])
+        yield create_rect(mx+40, my+425, field_w, 50, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+        yield create_text(mx+60, my+440, "Lunch with team", size=16)
     
-    # Date
-    elements.append(create_text(mx+40, my+500, "Date", size=14, color="#6b7280"))
-    elements.append(create_rect(mx+40, my+525, 420, 50, fill="#ffffff", stroke="#d1d5db", roundness=True))
-    elements.append(create_text(mx+60, my+540, "Today, Dec 4", size=16))
+        # Date
+        yield create_text(mx+40, my+500, "Date", size=14, color=THEME["muted"])
+        yield create_rect(mx+40, my+525, field_w, 50, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+        yield create_text(mx+60, my+540, "Today, Dec 4", size=16)
     
-    # Buttons
-    elements.append(create_rect(mx+40, my+620, 200, 50, fill="#ffffff", stroke="#d1d5db", roundness=True))
-    elements.append(create_text(mx+110, my+635, "Cancel", size=16))
+        # Buttons
+        yield create_rect(mx+40, my+620, button_w, 50, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+        yield create_text(mx+40+button_w//2-30, my+635, "Cancel", size=16)
     
-    elements.append(create_rect(mx+260, my+620, 200, 50, fill=THEME["danger"], stroke="transparent", roundness=True))
-    elements.append(create_text(mx+330, my+635, "Save Expense", size=16, color="#ffffff"))
+        yield create_rect(mx+60+button_w, my+620, button_w, 50, fill=THEME["danger"], stroke="transparent", roundness=True)
+        yield create_text(mx+60+button_w+button_w//2-30, my+635, "Save Expense", size=16, color=THEME["on_brand"])
+
+    modal = Leaf(modal_width, modal_height, modal)
+    yield from Center(modal, FRAME_WIDTH - SIDEBAR_WIDTH, FRAME_HEIGHT - 60).place(start_x + SIDEBAR_WIDTH, start_y + 60)
+
+
+TABLE_COLUMNS = [ # (heading, offset, text width) at the desktop content width
+    ("Date", 0, 150),
+    ("Description", 150, 330),
+    ("Category", 500, 150),
+    ("Account", 800, 230),
+    ("Amount", 1050, 150),
+]
 
+def table_columns():
+    # {heading: (offset, text width)} of the transactions table: the desktop
+    # columns scaled to the content width; narrow viewports keep date,
+    # description and amount
+    content_w = FRAME_WIDTH - SIDEBAR_WIDTH - 80
+    if content_w < 600:
+        return {"Date": (0, 60), "Description": (70, content_w - 170), "Amount": (content_w - 90, 90)}
+    return {name: (round(offset * content_w / 1080), round(width * content_w / 1080))
+            for name, offset, width in TABLE_COLUMNS}
+
+def history_row(row, columns, width):
+    date, desc, cat, acc, amt, color = row
+    def draw(rx, ry, w, h):
+        yield create_rect(rx, ry, w, h, fill=THEME["surface"], stroke="transparent") 
+        ry += 15
+        yield create_text(rx, ry, date, size=16)
+        yield create_text(rx+columns["Description"][0], ry, desc, size=16)
+        
+        # Category badge
+        if "Category" in columns:
+            offset, width = columns["Category"]
+            yield create_rect(rx+offset, ry-5, width+30, 30, fill=THEME["subtle"], stroke="transparent", roundness=True)
+            yield create_text(rx+offset+15, ry, cat, size=14)
+        
+        # Account text
+        if "Account" in columns:
+            yield create_text(rx+columns["Account"][0], ry, acc, size=14)
+        
+        yield create_text(rx+columns["Amount"][0], ry, amt, size=16, color=color)
+        
+        yield create_line(rx, ry+45, w, 0, [[0,0], [w,0]], strokeColor=THEME["subtle"])
+    return Leaf(width, 60, draw)
 
-def build_history(start_x, start_y):
-    build_screen_frame(start_x, start_y, "transactions")
-    build_nav(start_x, start_y)
+@traced
+def build_history(start_x, start_y, rows=None, page=None):
+    yield from build_screen_frame(start_x, start_y, "transactions" if page is None else f"transactions?page={page}")
+    yield from build_nav(start_x, start_y)
     
     content_x_offset = SIDEBAR_WIDTH + 40
+    content_w = FRAME_WIDTH - SIDEBAR_WIDTH - 80
     content_y = start_y + 100
     
-    elements.append(create_text(start_x+content_x_offset, content_y, "Recent Transactions", size=32))
+    yield create_text(start_x+content_x_offset, content_y, "Recent Transactions", size=32)
     
     # Filters
     fy = content_y + 60
-    elements.append(create_rect(start_x+content_x_offset, fy, 200, 40, fill="#ffffff", stroke="#d1d5db", roundness=True))
-    elements.append(create_text(start_x+content_x_offset+20, fy+10, "This Month", size=14))
+    filter_w = min(200, (content_w - 20) // 2)
+    yield create_rect(start_x+content_x_offset, fy, filter_w, 40, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+    yield create_text(start_x+content_x_offset+20, fy+10, "This Month", size=14)
     
-    elements.append(create_rect(start_x+content_x_offset+220, fy, 200, 40, fill="#ffffff", stroke="#d1d5db", roundness=True))
-    elements.append(create_text(start_x+content_x_offset+240, fy+10, "All Accounts", size=14))
+    yield create_rect(start_x+content_x_offset+filter_w+20, fy, filter_w, 40, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+    yield create_text(start_x+content_x_offset+filter_w+40, fy+10, "All Accounts", size=14)
     
     # Table Header
     ty = fy + 60
-    elements.append(create_text(start_x+content_x_offset, ty, "Date", size=14, color="#6b7280"))
-    elements.append(create_text(start_x+content_x_offset+150, ty, "Description", size=14, color="#6b7280"))
-    elements.append(create_text(start_x+content_x_offset+500, ty, "Category", size=14, color="#6b7280"))
-    elements.append(create_text(start_x+content_x_offset+800, ty, "Account", size=14, color="#6b7280"))
-    elements.append(create_text(start_x+content_x_offset+1050, ty, "Amount", size=14, color="#6b7280"))
-    elements.append(create_line(start_x+content_x_offset, ty+30, 1440 - SIDEBAR_WIDTH - 80, 0, [[0,0], [1440 - SIDEBAR_WIDTH - 80,0]])) 
+    columns = table_columns()
+    for name, (offset, _) in columns.items():
+        yield create_text(start_x+content_x_offset+offset, ty, name, size=14, color=THEME["muted"])
+    yield create_line(start_x+content_x_offset, ty+30, content_w, 0, [[0,0], [content_w,0]]) 
     
     # Rows
-    rows = [
-        ("Dec 4", "Lunch with team", "Dining Out", "Daily Spending", "- $45.00", THEME["danger"]),
-        ("Dec 3", "Weekly Groceries", "Groceries", "Daily Spending", "- $120.50", THEME["danger"]),
-        ("Dec 1", "Paycheck", "Salary", "Savings", "+ $2,250.00", THEME["success"]),
-        ("Nov 28", "Netflix", "Entertainment", "Daily Spending", "- $15.00", THEME["danger"]),
-        ("Nov 25", "Electric Bill", "Utilities", "Bills Account", "- $85.00", THEME["danger"]),
-    ]
+    if rows is None:
+        rows = [
+            ("Dec 4", "Lunch with team", "Dining Out", "Daily Spending", "- $45.00", THEME["danger"]),
+            ("Dec 3", "Weekly Groceries", "Groceries", "Daily Spending", "- $120.50", THEME["danger"]),
+            ("Dec 1", "Paycheck", "Salary", "Savings", "+ $2,250.00", THEME["success"]),
+            ("Nov 28", "Netflix", "Entertainment", "Daily Spending", "- $15.00", THEME["danger"]),
+            ("Nov 25", "Electric Bill", "Utilities", "Bills Account", "- $85.00", THEME["danger"]),
+        ]
     
-    ry = ty + 50
-    for date, desc, cat, acc, amt, color in rows:
-        elements.append(create_rect(start_x+content_x_offset, ry-15, 1440 - SIDEBAR_WIDTH - 80, 60, fill="#ffffff", stroke="transparent")) 
-        elements.append(create_text(start_x+content_x_offset, ry, date, size=16))
-        elements.append(create_text(start_x+content_x_offset+150, ry, desc, size=16))
-        
-        # Category badge
-        elements.append(create_rect(start_x+content_x_offset+500, ry-5, 180, 30, fill="#f3f4f6", stroke="transparent", roundness=True))
-        elements.append(create_text(start_x+content_x_offset+515, ry, cat, size=14))
-        
-        # Account text
-        elements.append(create_text(start_x+content_x_offset+800, ry, acc, size=14))
-        
-        elements.append(create_text(start_x+content_x_offset+1050, ry, amt, size=16, color=color))
-        
-        elements.append(create_line(start_x+content_x_offset, ry+45, 1440 - SIDEBAR_WIDTH - 80, 0, [[0,0], [1440 - SIDEBAR_WIDTH - 80,0]], strokeColor="#f3f4f6"))
-        ry += 60
+    yield from Column([history_row(row, columns, content_w) for row in rows]).place(start_x+content_x_offset, ty+35)
+
+    # Pagination
+    if page is not None:
+        py = start_y + FRAME_HEIGHT - 80
+        first = (page - 1) * HISTORY_PAGE_SIZE + 1
+        yield create_text(start_x+content_x_offset, py+10, f"Showing {first}-{first + len(rows) - 1}", size=14, color=THEME["muted"])
+        yield create_rect(start_x+FRAME_WIDTH-300, py, 100, 40, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+        yield create_text(start_x+FRAME_WIDTH-280, py+10, "Previous", size=14, color=THEME["faint"] if page == 1 else THEME["text"])
+        yield create_text(start_x+FRAME_WIDTH-180, py+10, f"Page {page}", size=14)
+        yield create_rect(start_x+FRAME_WIDTH-100, py, 60, 40, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+        yield create_text(start_x+FRAME_WIDTH-85, py+10, "Next", size=14)
 
-def build_viz(start_x, start_y):
-    build_screen_frame(start_x, start_y, "visualizations")
-    build_nav(start_x, start_y)
+@traced
+def build_viz(start_x, start_y, months=None, categories=None, series=None):
+    # months: [(label, income, spent per category)]; series: [(day ordinal, balance)]
+    yield from build_screen_frame(start_x, start_y, "visualizations")
+    yield from build_nav(start_x, start_y)
     
     content_x_offset = SIDEBAR_WIDTH + 40
+    content_w = FRAME_WIDTH - SIDEBAR_WIDTH - 80
     content_y = start_y + 100
+    bottom = start_y + FRAME_HEIGHT - 20
     
-    elements.append(create_text(start_x+content_x_offset, content_y, "Financial Insights", size=32))
+    if months is None:
+        months, categories = MONTHLY, SPENDING_CATEGORIES
+    if series is None:
+        series = daily_balance(months)
+    colors = [CHART_COLORS[i % len(CHART_COLORS)] for i in range(len(categories))]
     
-    # Pie Chart Section
+    yield create_text(start_x+content_x_offset, content_y, "Financial Insights", size=32)
+    
+    # Chart panels sit side by side while two fit and stack otherwise;
+    # sections that would end below the fold are left out
+    side_by_side = content_w >= 640
+    panel_w = min(480, (content_w - 40) // 2) if side_by_side else content_w
+    px = start_x + content_x_offset
     py = content_y + 80
-    elements.append(create_rect(start_x+content_x_offset, py, 480, 500, fill="#ffffff", stroke="#e5e7eb", roundness=True)) # Adjusted width
-    elements.append(create_text(start_x+content_x_offset+30, py+30, "Spending by Category", size=20))
-    
-    # Simulating Pie Chart
-    cx, cy = start_x+content_x_offset+240, py+280
-    elements.append(create_ellipse(cx-150, cy-150, 300, 300, fill="#transparent", stroke="#e5e7eb"))
-    
-    # Slices (Simulated with arcs/lines or just colors)
-    # Since excalidraw JSON arcs are complex, we'll use a simpler representation
-    # Slice 1
-    elements.append(create_ellipse(cx-150, cy-150, 300, 300, stroke=THEME["brand"])) # Outline
-    elements.append(create_line(cx, cy, 0, -150, [[0,0], [0,-150]]))
-    elements.append(create_line(cx, cy, 130, 75, [[0,0], [130,75]]))
-    elements.append(create_line(cx, cy, -130, 75, [[0,0], [-130,75]]))
-    
-    elements.append(create_text(cx+80, cy-80, "Groceries\n40%", size=14))
-    elements.append(create_text(cx-100, cy+80, "Rent\n35%", size=14))
-    elements.append(create_text(cx-100, cy-80, "Others\n25%", size=14))
-    
-    # Bar Chart Section (Adjusted position and width)
-    bx = start_x + content_x_offset + 520 # Adjusted x
-    elements.append(create_rect(bx, py, 480, 500, fill="#ffffff", stroke="#e5e7eb", roundness=True)) # Adjusted width
-    elements.append(create_text(bx+30, py+30, "Income vs Expenses (6 Months)", size=20))
-    
-    # Bars
-    bar_x = bx + 40
-    bar_base = py + 400
-    
-    months = ["Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    for i, m in enumerate(months):
-        # Income Bar
-        h_inc = random.randint(100, 200) # Smaller bars due to smaller chart width
-        elements.append(create_rect(bar_x, bar_base-h_inc, 20, h_inc, fill=THEME["success"], stroke="transparent")) # Smaller bar width
+    bx, by = (px + panel_w + 40, py) if side_by_side else (px, py + 460)
+    
+    # Pie Chart Section
+    if py + 440 <= bottom:
+        yield create_rect(px, py, panel_w, 440, fill=THEME["surface"], stroke=THEME["border"], roundness=True)
+        yield create_text(px+30, py+30, "Spending by Category", size=20)
         
-        # Expense Bar
-        h_exp = random.randint(80, 150) # Smaller bars
-        elements.append(create_rect(bar_x+25, bar_base-h_exp, 20, h_exp, fill=THEME["danger"], stroke="transparent")) # Smaller bar width
+        cx, cy = px+panel_w//2, py+240
+        radius = min(140, (panel_w - 60) // 2)
+        totals = [sum(month[2][i] for month in months) for i in range(len(categories))]
+        for (points, (lx, ly), fraction), name, color in zip(charts.pie_slices(totals, radius), categories, colors):
+            xs, ys = [p[0] for p in points], [p[1] for p in points]
+            yield create_line(cx, cy, max(xs) - min(xs), max(ys) - min(ys), points,
+                              strokeColor=THEME["surface"], backgroundColor=color)
+            if fraction >= 0.06: # Thinner slices are left to the bar chart legend
+                label = f"{fit_text(name, 110, 14, font_family)}\n{fraction:.0%}"
+                w, h = measure_text(label, 14, font_family)
+                yield create_text(cx+lx-w/2, cy+ly-h/2, label, size=14, align="center", color=THEME["on_brand"])
+    
+    # Bar Chart Section: income next to expenses stacked by category
+    if by + 440 <= bottom:
+        yield create_rect(bx, by, panel_w, 440, fill=THEME["surface"], stroke=THEME["border"], roundness=True)
+        title = fit_text(f"Income vs Expenses ({len(months)} Months)", panel_w - 60, 20, font_family)
+        yield create_text(bx+30, by+30, title, size=20)
         
-        elements.append(create_text(bar_x+10, bar_base+10, m, size=12)) # Smaller text
+        plot_x, plot_y, plot_w, plot_h = bx+70, by+90, panel_w-90, 250
+        labels, groups = charts.rebin([m[0] for m in months], [[[m[1]], m[2]] for m in months], max_groups=24)
+        top = charts.nice_ceiling(max(max(sum(stack) for stack in group) for group in groups))
+        for i in range(5):
+            gy = plot_y + plot_h - plot_h * i / 4
+            yield create_line(plot_x, gy, plot_w, 0, [[0,0], [plot_w,0]], strokeColor=THEME["border"])
+            yield create_text(bx+15, gy-8, money(top * i / 4), size=12, color=THEME["muted"])
+        for income, expenses in charts.bar_rects(groups, plot_w, plot_h, top=top):
+            for (x, y, w, h), color in itertools.chain([(income[0], THEME["success"])], zip(expenses, colors)):
+                if h > 0:
+                    yield create_rect(plot_x+x, plot_y+y, w, h, fill=color, stroke="transparent")
+        slot = plot_w / len(groups)
+        every = max(1, -(-max(measure_text(label, 12, font_family)[0] for label in labels) // (slot * 0.9)))
+        for i, label in enumerate(labels[::int(every)]):
+            yield create_text(plot_x + i * every * slot + slot * 0.15, plot_y+plot_h+8, label, size=12)
         
-        bar_x += 70 # Smaller spacing
+        # Legend
+        lx = bx + 30
+        for name, color in [("Income", THEME["success"])] + list(zip(categories, colors)):
+            w = measure_text(name, 12, font_family)[0]
+            if lx + 18 + w > bx + panel_w - 20:
+                break
+            yield create_rect(lx, by+392, 12, 12, fill=color, stroke="transparent")
+            yield create_text(lx+18, by+390, name, size=12)
+            lx += 18 + w + 16
+    
+    # Balance Section: the daily series, downsampled to ~1 point per 2 px
+    ly = by + 460
+    balance_w = min(1000, content_w)
+    if ly + 230 <= bottom:
+        yield create_rect(px, ly, balance_w, 230, fill=THEME["surface"], stroke=THEME["border"], roundness=True)
+        yield create_text(px+30, ly+20, "Balance", size=20)
+    if ly + 230 <= bottom and len(series) > 1:
+        days, balances = [s[0] for s in series], [s[1] for s in series]
+        low, high = min(balances), max(balances)
+        lx0, lw, lh = px+100, balance_w-140, 120
+        points = charts.line_points(days, balances, lw, lh, max_points=lw // 2, y_range=(low, high))
+        yield create_line(lx0, ly+60, lw, lh, points, strokeColor=THEME["brand"], strokeWidth=2)
+        yield create_text(px+30, ly+52, money(high), size=12, color=THEME["muted"])
+        yield create_text(px+30, ly+60+lh-8, money(low), size=12, color=THEME["muted"])
+        first, last = (datetime.date.fromordinal(day) for day in (days[0], days[-1]))
+        yield create_text(lx0, ly+190, f"{first:%b %d, %Y}", size=12, color=THEME["muted"])
+        label = f"{last:%b %d, %Y}"
+        yield create_text(lx0+lw-measure_text(label, 12, font_family)[0], ly+190, label, size=12, color=THEME["muted"])
 
+@traced
 def build_create_account(start_x, start_y):
     # Background (Blurred/Dimmed Dashboard)
-    build_dashboard(start_x, start_y) 
+    yield from build_dashboard(start_x, start_y) 
     # Overlay
-    elements.append(create_rect(start_x + SIDEBAR_WIDTH, start_y + 60, 1440 - SIDEBAR_WIDTH, 840, fill="#000000", stroke="transparent", opacity=50))
+    yield create_rect(start_x + SIDEBAR_WIDTH, start_y + 60, FRAME_WIDTH - SIDEBAR_WIDTH, FRAME_HEIGHT - 60,
+                      fill=THEME["overlay"], stroke="transparent", opacity=50)
     
     # Modal
-    modal_width = 500
+    modal_width = min(500, FRAME_WIDTH - SIDEBAR_WIDTH - 40)
     modal_height = 500
+    field_w = modal_width - 80
+    button_w = (modal_width - 100) // 2
     
-    mx = start_x + SIDEBAR_WIDTH + ((1440 - SIDEBAR_WIDTH) - modal_width) / 2
-    my = start_y + 60 + (840 - modal_height) / 2
-    
-    elements.append(create_rect(mx, my, modal_width, modal_height, fill="#ffffff", roundness=True))
+    def modal(mx, my, modal_width, modal_height):
+        yield create_rect(mx, my, modal_width, modal_height, fill=THEME["surface"], roundness=True)
     
-    elements.append(create_text(mx+40, my+40, "Create New Account", size=24))
+        yield create_text(mx+40, my+40, "Create New Account", size=24)
     
-    # Account Name
-    elements.append(create_text(mx+40, my+100, "Account Name", size=14, color="#6b7280"))
-    elements.append(create_rect(mx+40, my+125, 420, 50, fill="#ffffff", stroke="#d1d5db", roundness=True))
-    elements.append(create_text(mx+60, my+140, "e.g. Holiday Fund", size=16, color="#9ca3af"))
+        # Account Name
+        yield create_text(mx+40, my+100, "Account Name", size=14, color=THEME["muted"])
+        yield create_rect(mx+40, my+125, field_w, 50, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+        yield create_text(mx+60, my+140, "e.g. Holiday Fund", size=16, color=THEME["faint"])
     
-    # Allocation Percentage
-    elements.append(create_text(mx+40, my+200, "Income Allocation %", size=14, color="#6b7280"))
-    elements.append(create_rect(mx+40, my+225, 420, 50, fill="#ffffff", stroke="#d1d5db", roundness=True))
-    elements.append(create_text(mx+60, my+240, "10", size=16))
-    elements.append(create_text(mx+380, my+240, "%", size=16, color="#6b7280"))
+        # Allocation Percentage
+        yield create_text(mx+40, my+200, "Income Allocation %", size=14, color=THEME["muted"])
+        yield create_rect(mx+40, my+225, field_w, 50, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+        yield create_text(mx+60, my+240, "10", size=16)
+        yield create_text(mx+modal_width-120, my+240, "%", size=16, color=THEME["muted"])
     
-    # Initial Balance (Optional)
-    elements.append(create_text(mx+40, my+300, "Initial Balance (Optional)", size=14, color="#6b7280"))
-    elements.append(create_rect(mx+40, my+325, 420, 50, fill="#ffffff", stroke="#d1d5db", roundness=True))
-    elements.append(create_text(mx+60, my+340, "$ 0.00", size=16))
+        # Initial Balance (Optional)
+        yield create_text(mx+40, my+300, "Initial Balance (Optional)", size=14, color=THEME["muted"])
+        yield create_rect(mx+40, my+325, field_w, 50, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+        yield create_text(mx+60, my+340, "$ 0.00", size=16)
     
-    # Buttons
-    elements.append(create_rect(mx+40, my+410, 200, 50, fill="#ffffff", stroke="#d1d5db", roundness=True))
-    elements.append(create_text(mx+110, my+425, "Cancel", size=16))
+        # Buttons
+        yield create_rect(mx+40, my+410, button_w, 50, fill=THEME["surface"], stroke=THEME["control"], roundness=True)
+        yield create_text(mx+40+button_w//2-30, my+425, "Cancel", size=16)
     
-    elements.append(create_rect(mx+260, my+410, 200, 50, fill=THEME["brand"], stroke="transparent", roundness=True))
-    elements.append(create_text(mx+330, my+425, "Create Account", size=16, color="#ffffff"))
+        yield create_rect(mx+60+button_w, my+410, button_w, 50, fill=THEME["brand"], stroke="transparent", roundness=True)
+        yield create_text(mx+60+button_w+button_w//2-30, my+425, "Create Account", size=16, color=THEME["on_brand"])
 
-# --- Main Execution ---
-
-# Grid Layout
-# 0,0: Login
-# 1600,0: Dashboard
-# 3200,0: Add Expense (Modal view)
-# 1600, 1100: History
-# 3200, 1100: Create Account (Modal view)
-# 4800, 0: Viz
+    modal = Leaf(modal_width, modal_height, modal)
+    yield from Center(modal, FRAME_WIDTH - SIDEBAR_WIDTH, FRAME_HEIGHT - 60).place(start_x + SIDEBAR_WIDTH, start_y + 60)
 
-build_login(0, 0)
-build_dashboard(1600, 0)
-build_add_expense(3200, 0)
-build_history(1600, 1100)
-build_create_account(3200, 1100)
-build_viz(4800, 0)
 
+# --- Output ---
 
-# Output
-data = {
+DOCUMENT = {
     "type": "excalidraw",
     "version": 2,
     "source": "https://excalidraw.com",
-    "elements": elements,
+    "elements": [],
     "appState": {
         "gridSize": 20,
         "viewBackgroundColor": "#f0f0f0"
@@ -465,7 +857,535 @@ data = {
     "files": {}
 }
 
-with open(OUTPUT_FILE, "w") as f:
-    json.dump(data, f, indent=2)
+COMPRESSED_SUFFIX = board.COMPRESSED_SUFFIX
+
+def open_output(path, compress=None):
+    # Plain JSON unless `compress` asks otherwise, whatever the suffix
+    return board.open_board(path, "w", compress or "")
+
+def _element_to_dict(el):
+    if isinstance(el, Element):
+        return el.to_dict()
+    raise TypeError(f"Object of type {type(el).__name__} is not JSON serializable")
+
+def _encoder(compact):
+    separators = (",", ":") if compact else (",", ": ")
+    return json.JSONEncoder(indent=None if compact else 2, separators=separators,
+                            default=_element_to_dict)
+
+def encode_elements(elements, compact=False):
+    # Each element's text as it sits inside the document's "elements" array
+    encoder = _encoder(compact)
+    for el in elements:
+        text = encoder.encode(el)
+        yield text if compact else text.replace("\n", "\n    ")
+
+def write_encoded(f, texts, compact=False):
+    # The indented layout is byte-for-byte what json.dump(data, f, indent=2) gives
+    encoder = _encoder(compact)
+    empty = '"elements"' + encoder.key_separator + "[]"
+    head, tail = encoder.encode(DOCUMENT).split(empty)
+    first, between, close = ("", ",", "") if compact else ("\n    ", ",\n    ", "\n  ")
+
+    f.write(head + empty[:-1])
+    count = 0
+    for text in texts:
+        f.write((between if count else first) + text)
+        count += 1
+    f.write((close if count else "") + "]" + tail)
+    return count
+
+@traced
+def write_scene(f, elements, compact=False):
+    # Encodes one element at a time instead of building the whole document
+    return write_encoded(f, encode_elements(elements, compact), compact)
+
+
+# --- Delta output ---
+
+# Bookkeeping fields that change on every write without changing the element
+DELTA_IGNORED = ("version", "versionNonce", "updated")
+
+def _content_digest(el):
+    content = {k: v for k, v in el.items() if k not in DELTA_IGNORED}
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+def index_scene(path):
+    # {id: (content digest, version)} for the live elements of a previous board
+    if not os.path.exists(path):
+        return {}
+    return {el["id"]: (_content_digest(el), el.get("version", 1))
+            for el in board.elements(path) if not el.get("isDeleted")}
+
+class Delta:
+    def __init__(self, previous):
+        self.previous = previous
+        self.added = []
+        self.changed = []
+        self.seen = set()
+
+    def track(self, elements):
+        # Passes elements through, carrying versions over from the previous
+        # board and bumping them for elements whose content changed
+        for el in elements:
+            if isinstance(el, Element):
+                el = el.to_dict()
+            self.seen.add(el["id"])
+            prev = self.previous.get(el["id"])
+            if prev is None:
+                self.added.append(el)
+            elif prev[0] != _content_digest(el):
+                el["version"] = prev[1] + 1
+                self.changed.append(el)
+            else:
+                el["version"] = prev[1]
+            yield el
+
+    def deleted(self):
+        # Excalidraw-style tombstones for elements that are gone
+        return [{"id": id, "version": version + 1, "isDeleted": True}
+                for id, (_, version) in self.previous.items() if id not in self.seen]
+
+    def write(self, f, base):
+        json.dump({
+            "type": "excalidraw-delta",
+            "version": 1,
+            "source": DOCUMENT["source"],
+            "base": base,
+            "added": self.added,
+            "changed": self.changed,
+            "deleted": self.deleted(),
+        }, f, indent=2)
+
+
+# --- Main Execution ---
+
+# Grid Layout
+# 0,0: Login
+# 1600,0: Dashboard
+# 3200,0: Add Expense (Modal view)
+# 1600, 1100: History
+# 3200, 1100: Create Account (Modal view)
+# 4800, 0: Viz
+SCREENS = [
+    (build_login, 0, 0),
+    (build_dashboard, 1600, 0),
+    (build_add_expense, 3200, 0),
+    (build_history, 1600, 1100),
+    (build_create_account, 3200, 1100),
+    (build_viz, 4800, 0),
+]
+
+HISTORY_PAGE_SIZE = (FRAME_HEIGHT - 335) // 60 # Table rows that fit above the pagination bar
+GRID = (1600, 1100) # Screen slot pitch
+GRID_COLUMNS = 4
+
+def grid_slots(screens, columns=GRID_COLUMNS):
+    # Free (x, y) slots of the screen grid, row by row
+    taken = {(x, y) for _, x, y, *_ in screens}
+    for i in itertools.count():
+        slot = (i % columns * GRID[0], i // columns * GRID[1])
+        if slot not in taken:
+            yield slot
+
+def transaction_rows(records, columns):
+    # History table rows for a page of export records. Real exports have longer
+    # names than the mockup: each text column is measured in one batch and only
+    # the entries near or past their column width are cut down to fit.
+    rows = [table_row(record) for record in records]
+    fields = [list(column) for column in zip(*rows)]
+    for index, column, size in ((1, "Description", 16), (2, "Category", 14), (3, "Account", 14)):
+        if not rows or column not in columns:
+            continue
+        width = columns[column][1]
+        texts = fields[index]
+        for i, (w, _) in enumerate(measure_texts(texts, size, font_family)):
+            if w > width - 1 or "\n" in texts[i]:
+                texts[i] = fit_text(texts[i], width, size, font_family)
+    return [(date, desc, cat, acc, amt, THEME["success" if income else "danger"])
+            for date, desc, cat, acc, amt, income in zip(*fields)]
+
+def history_pages(path, screens=None, page_size=None):
+    # One transactions screen per page of an export, in the grid slots left
+    # free by `screens` (default: SCREENS). Lazy all the way down: only the
+    # pages being built are in memory.
+    page_size = page_size or HISTORY_PAGE_SIZE
+    columns = table_columns()
+    records = read_transactions(path)
+    for page, (x, y) in zip(itertools.count(1), grid_slots(SCREENS if screens is None else screens)):
+        chunk = transaction_rows(itertools.islice(records, page_size), columns)
+        if not chunk:
+            return
+        yield (build_history, x, y, chunk, page)
+
+def screen_name(screen):
+    builder, x, y = screen[:3]
+    return f"{builder.__name__}@{x},{y}"
+
+@traced
+def build_screen(screen):
+    # Each builder's output is its own fragment, so screens can be built anywhere
+    builder, x, y, *args = screen
+    begin_scope(screen_name(screen))
+    return list(builder(x, y, *args))
+
+def _init_worker(settings):
+    configure(**settings)
+
+def build_fragments(screens, jobs=1):
+    # Yields fragments in the order of `screens`, whichever worker finishes first
+    if jobs <= 1:
+        for screen in screens:
+            yield build_screen(screen)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(settings(),)) as pool:
+        pending = collections.deque()
+        for screen in screens:
+            pending.append(pool.submit(build_screen, screen))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+# --- Incremental builds ---
+
+def _global_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
+
+@functools.lru_cache(maxsize=2)
+def definitions(source):
+    # {name: source text} of the top-level functions, classes and assignments,
+    # decorators included; parsed once per version of the script
+    lines = source.splitlines(keepends=True)
+    segments = {}
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            name = node.name
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+        else:
+            continue
+        first = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", ())])
+        segments[name] = "".join(lines[first - 1:node.end_lineno])
+    return segments
+
+def fingerprint(fn):
+    # Hash of fn's source plus every helper, class and config value it reaches
+    # through module globals (create_*, Element, THEME, SIDEBAR_WIDTH, ...)
+    module = globals()
+    sources = definitions(inspect.getsource(sys.modules[__name__]))
+    parts = {}
+    todo = [fn.__name__]
+    while todo:
+        name = todo.pop()
+        if name in parts or name not in module:
+            continue
+        obj = untraced(module[name]) # --profile's wrappers mustn't change the keys
+        if inspect.ismodule(obj):
+            owner = obj.__name__
+        else:
+            owner = getattr(obj, "__module__", None) if callable(obj) else None
+        if owner and owner.startswith("wireframe."):
+            # Support modules (charts, text metrics, ...) count as a whole; this
+            # also catches wrapped callables such as the lru_cache'd measure_text
+            parts[name] = inspect.getsource(sys.modules[owner])
+        elif inspect.isfunction(obj) or inspect.isclass(obj):
+            if obj.__module__ != __name__:
+                continue
+            parts[name] = sources.get(name) or inspect.getsource(obj)
+            if inspect.isclass(obj):
+                codes = [untraced(f).__code__ for f in vars(obj).values() if inspect.isfunction(f)]
+            else:
+                # Decorated builders depend on their wrapper (e.g. component) too
+                codes = {obj.__code__, inspect.unwrap(obj).__code__}
+            for code in codes:
+                todo.extend(_global_names(code))
+        elif not name.startswith("_") and type(obj) in (dict, list, tuple, str, int, float, bool, type(None)):
+            parts[name] = repr(obj)
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+def screen_key(screen, fingerprints):
+    # Changes whenever anything the screen's fragment depends on changes;
+    # `fingerprints` memoizes fingerprint() per builder within one pass
+    builder, x, y, *args = screen
+    if builder not in fingerprints:
+        fingerprints[builder] = fingerprint(builder)
+    key = f"{builder.__name__}:{x}:{y}:{args!r}:{json.dumps(settings(), sort_keys=True)}:{fingerprints[builder]}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+def plan_cache(screens, cache_dir=CACHE_DIR):
+    # Yields (screen, fragment path, cached?) in screen order
+    fingerprints = {}
+    for screen in screens:
+        path = os.path.join(cache_dir, screen_key(screen, fingerprints) + ".json")
+        yield screen, path, os.path.exists(path)
+
+def cached_fragments(plan, jobs=1, log=None):
+    # Loads unchanged screens from the cache and rebuilds (and stores) the rest.
+    # The plan is read once, so screens can be streamed; `log` collects
+    # (path, cached?) of every screen for prune_cache().
+    plan, misses = itertools.tee(plan)
+    rebuilt = build_fragments((screen for screen, _, hit in misses if not hit), jobs)
+    for screen, path, hit in plan:
+        if log is not None:
+            log.append((path, hit))
+        if hit:
+            with open(path) as f:
+                yield json.load(f)
+            continue
+        fragment = [el.to_dict() for el in next(rebuilt)]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump(fragment, f, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+        yield fragment
+
+def prune_cache(log, cache_dir=CACHE_DIR):
+    # Removes fragments that no screen of the last run maps to anymore
+    live = {os.path.basename(path) for path, _ in log}
+    for name in os.listdir(cache_dir):
+        if name.endswith(".json") and name not in live:
+            os.remove(os.path.join(cache_dir, name))
+
+
+# --- Theme and viewport variants ---
+
+# theme.json's appearance names for THEME keys
+APPEARANCE_KEYS = {"backgroundColor": "bg", "primaryFill": "container", "secondaryFill": "surface",
+                   "accent": "stroke", "text": "text"}
+
+def load_theme(name):
+    # (name, palette) of a built-in theme or of a theme.json-style file;
+    # keys the file leaves out come from the light theme
+    if name in THEMES:
+        return name, THEMES[name]
+    with open(name) as f:
+        appearance = json.load(f).get("appearance", {})
+    palette = dict(THEMES["light"])
+    for key, value in appearance.items():
+        palette[APPEARANCE_KEYS.get(key, key)] = value
+    return os.path.splitext(os.path.basename(name))[0], palette
+
+def restyle(elements, palette):
+    # Style-only pass over a layout built with theme tokens: copies with the
+    # tokens resolved to `palette`; geometry, ids and text are left as they are
+    def color(value):
+        return palette[value[len(TOKEN):]] if isinstance(value, str) and value.startswith(TOKEN) else value
+    for el in elements:
+        if isinstance(el, dict): # Fragments loaded from the --incremental cache
+            yield dict(el, strokeColor=color(el["strokeColor"]), backgroundColor=color(el["backgroundColor"]))
+            continue
+        copy = Element(*(getattr(el, name) for name in Element.__slots__))
+        copy.strokeColor = color(el.strokeColor)
+        copy.backgroundColor = color(el.backgroundColor)
+        yield copy
+
+def variant_path(output, theme, viewport):
+    # docs/diagrams/board.excalidraw.gz -> docs/diagrams/board-dark-tablet.excalidraw.gz
+    head, dot, tail = output.partition(".excalidraw")
+    if not dot:
+        head, tail = os.path.splitext(output)
+    return f"{head}-{theme}-{viewport}{dot}{tail}"
+
+def generate_variants(screens_for, themes, viewports, output, args, jobs=1):
+    # Lays out each viewport once with theme tokens and writes one board per
+    # theme from that layout; a viewport's fragments stay in memory while its
+    # themes are written. Returns the lint report lines and problem count.
+    log = []
+    reports = []
+    problems = 0
+    for viewport in viewports:
+        configure(args.deterministic, args.seed, viewport=viewport, tokens=True)
+        screens = screens_for()
+        if args.lint:
+            screens, linted = itertools.tee(screens)
+        if args.incremental:
+            fragments = cached_fragments(plan_cache(screens), jobs, log)
+        else:
+            fragments = build_fragments(screens, jobs)
+        if args.lint:
+            linter = Linter()
+            fragments = linter.check(map(screen_name, linted), fragments)
+        fragments = list(fragments)
+        for theme, palette in themes:
+            path = variant_path(output, theme, viewport)
+            with open_output(path, args.compress) as f:
+                count = write_scene(f, restyle(itertools.chain.from_iterable(fragments), palette), compact=args.compact)
+            print(f"Generated {count} elements to {path}")
+        if args.lint and linter.violations:
+            reports.append(f"[{viewport}]\n{linter.report()}")
+            problems += len(linter.violations)
+    if args.incremental:
+        prune_cache(log)
+        print(f"Rebuilt {sum(not hit for _, hit in log)} of {len(log)} screens")
+    return reports, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the ExpensesTracker Excalidraw wireframe.")
+    parser.add_argument("-o", "--output", help=f"output path (default: {OUTPUT_FILE})")
+    parser.add_argument("--compact", action="store_true", help="write JSON without indentation")
+    parser.add_argument("--compress", choices=sorted(COMPRESSED_SUFFIX),
+                        help="compress the output; the default path gets a .gz/.zst suffix")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="build screens on N worker processes (0: one per CPU)")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"reuse cached fragments of unchanged screens from {CACHE_DIR}")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="derive ids from element paths, seed randomness and fix timestamps")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for --deterministic (default: 0)")
+    parser.add_argument("--delta", metavar="PATH",
+                        help="also write the elements added, changed or deleted since the previous output to PATH "
+                             "(implies --deterministic, so unchanged elements keep their ids)")
+    parser.add_argument("--lint", action="store_true",
+                        help="report overlapping screens and shapes, out-of-frame elements and overflowing text")
+    parser.add_argument("--transactions", metavar="PATH",
+                        help="add paginated transaction screens built from a CSV, JSON or JSON Lines export "
+                             "(Prisma Transaction fields), streamed page by page")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="time builders, helpers and the serializer; writes a Chrome trace to PATH "
+                             "and a summary to stderr (builds serially)")
+    parser.add_argument("--render", metavar="DIR",
+                        help="also render every screen to DIR/<screen>.svg, in parallel with -j; "
+                             f"tiles of unchanged screens are reused from {CACHE_DIR}/tiles")
+    parser.add_argument("--png", type=float, metavar="SCALE",
+                        help="with --render, also write PNG thumbnails at SCALE (e.g. 0.25)")
+    parser.add_argument("--themes", metavar="NAMES",
+                        help=f"write one board per theme ({', '.join(THEMES)} or theme.json-style files), "
+                             "comma-separated; combines with --viewports")
+    parser.add_argument("--viewports", metavar="NAMES",
+                        help=f"write one board per viewport ({', '.join(VIEWPORTS)}), comma-separated; "
+                             "each viewport is laid out once and shared by all themes")
+    parser.add_argument("--library", metavar="PATH",
+                        help="write each repeated component (browser chrome, sidebar, the dashboard behind "
+                             "modals) once to this .excalidrawlib and reference it from the board")
+    parser.add_argument("--watch", action="store_true",
+                        help="stay running and regenerate changed screens whenever this script "
+                             "or a wireframe/ module is saved")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="with --watch, serve the current board on http://127.0.0.1:PORT/")
+    args = parser.parse_args(argv)
+    jobs = args.jobs or os.cpu_count()
+    batch = args.themes or args.viewports
+    if batch and (args.delta or args.profile or args.render or args.watch):
+        parser.error("--themes/--viewports can't be combined with --delta, --profile, --render or --watch")
+    if args.library and (batch or args.incremental or args.delta or args.watch):
+        # Cached fragments and restyled variants no longer know which component drew what
+        parser.error("--library can't be combined with --themes/--viewports, --incremental, --delta or --watch")
+    if args.delta:
+        args.deterministic = True # Random ids would make every element look deleted and re-added
+    if args.watch and (args.compress or args.transactions or args.lint or args.incremental or args.jobs != 1
+                       or args.delta or args.profile or args.render):
+        # The watch session rebuilds the built-in screens in-process and writes plain JSON
+        parser.error("--watch can't be combined with --compress, --transactions, --lint, --incremental, "
+                     "--jobs, --delta, --profile or --render")
+    if args.serve and not args.watch:
+        parser.error("--serve needs --watch")
+    if args.viewports and set(args.viewports.split(",")) - set(VIEWPORTS):
+        parser.error(f"unknown viewport in {args.viewports!r} (choose from {', '.join(VIEWPORTS)})")
+    for name in (args.themes or "").split(","):
+        if name and name not in THEMES and not os.path.isfile(name):
+            parser.error(f"unknown theme {name!r} (choose from {', '.join(THEMES)} or give a theme file)")
+    configure(args.deterministic, args.seed)
+
+    if args.watch:
+        from wireframe import watch
+        output = args.output or OUTPUT_FILE
+        watch.run(sys.modules[__name__], output, compact=args.compact, port=args.serve)
+        return
+
+    chart_data = aggregate(read_transactions(args.transactions)) if args.transactions else None
+    def screens_for():
+        # SCREENS with the export's charts and transaction pages, for the current viewport
+        screens = SCREENS
+        if chart_data and chart_data[0]:
+            screens = [(builder, x, y, *chart_data) if builder is build_viz else (builder, x, y, *rest)
+                       for builder, x, y, *rest in SCREENS]
+        if args.transactions:
+            screens = itertools.chain(screens, history_pages(args.transactions))
+        return screens
+
+    if batch:
+        output = args.output or OUTPUT_FILE + COMPRESSED_SUFFIX.get(args.compress, "")
+        themes = [load_theme(name) for name in (args.themes or "light").split(",")]
+        reports, problems = generate_variants(screens_for, themes, (args.viewports or "desktop").split(","),
+                                              output, args, jobs)
+        if problems:
+            print("\n".join(reports), file=sys.stderr)
+            sys.exit(f"Lint: {problems} layout problems")
+        return
+
+    screens = screens_for()
+    if args.profile:
+        profiler = Profiler()
+        profiler.instrument(globals())
+        profiler.count_method(rng, "randint", "rng.randint")
+        screens = profiler.rebind(screens)
+        jobs = 1 # Spans are only collected in this process
+
+    if args.lint:
+        screens, linted = itertools.tee(screens)
+    if args.render:
+        screens, rendered = itertools.tee(screens)
+
+    if args.incremental:
+        log = []
+        fragments = cached_fragments(plan_cache(screens), jobs, log)
+    else:
+        fragments = build_fragments(screens, jobs)
+
+    if args.lint:
+        linter = Linter()
+        fragments = linter.check(map(screen_name, linted), fragments)
+    if args.render:
+        renderer = Renderer(args.render, jobs, args.png, os.path.join(CACHE_DIR, "tiles"))
+        fragments = renderer.render(map(screen_name, rendered), fragments)
+
+    output = args.output or OUTPUT_FILE + COMPRESSED_SUFFIX.get(args.compress, "")
+    elements = itertools.chain.from_iterable(fragments)
+    if args.delta:
+        delta = Delta(index_scene(output))
+        elements = delta.track(elements)
+
+    if args.library:
+        encoder = _encoder(args.compact)
+        encode = encoder.encode if args.compact else lambda el: encoder.encode(el).replace("\n", "\n    ")
+        library = Library(lambda el: getattr(el, "instance", None), encode, 1 if args.compact else 6)
+        elements = library.dedupe(elements)
+
+    with open_output(output, args.compress) as f:
+        count = write_scene(f, elements, compact=args.compact)
+
+    print(f"Generated {count} elements to {output}")
+    if args.library:
+        with open(args.library, "w") as f:
+            size = library.write(f, compact=args.compact)
+        print(f"Library: {len(library.items)} items for {library.instances} instances -> {args.library} "
+              f"({size} bytes); {library.saved} bytes saved")
+    if args.render:
+        renderer.close()
+        print(f"Rendered {renderer.tiles} tiles ({renderer.hits} files from cache) to {args.render}")
+    if args.delta:
+        with open(args.delta, "w") as f:
+            delta.write(f, base=output)
+        print(f"Delta: {len(delta.added)} added, {len(delta.changed)} changed, "
+              f"{len(delta.deleted())} deleted -> {args.delta}")
+    if args.profile:
+        with open(args.profile, "w") as f:
+            profiler.write_chrome_trace(f)
+        print(profiler.summary(), file=sys.stderr)
+    if args.incremental:
+        prune_cache(log)
+        print(f"Rebuilt {sum(not hit for _, hit in log)} of {len(log)} screens")
+    if args.lint and linter.violations: # Last, since it exits with an error
+        print(linter.report(), file=sys.stderr)
+        sys.exit(f"Lint: {len(linter.violations)} layout problems")
+
 
-print(f"Generated {len(elements)} elements to {OUTPUT_FILE}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Round trips through wireframe.board.patch: untouched bytes must survive as
+# they were, in every layout and compression a board can come in
+import gzip
+import json
+
+import pytest
+
+from wireframe import board
+
+ELEMENTS = [
+    {"type": "rectangle", "id": "a", "x": 0, "y": 0, "width": 100, "height": 50,
+     "strokeColor": "#4f46e5", "backgroundColor": "transparent", "version": 1},
+    {"type": "text", "id": "b", "x": 10, "y": 10, "width": 40, "height": 20, "text": "Café \U0001F3E0",
+     "strokeColor": "#1e1e1e", "backgroundColor": "#4f46e5", "version": 3},
+    {"type": "line", "id": "c", "x": 0, "y": 60, "width": 100, "height": 0, "points": [[0, 0], [100, 0]],
+     "strokeColor": "#1e1e1e", "backgroundColor": "transparent"},
+]
+
+LAYOUTS = {
+    "indented": lambda doc: json.dumps(doc, indent=2),
+    "compact": lambda doc: json.dumps(doc, separators=(",", ":")),
+}
+
+def _document():
+    return {"type": "excalidraw", "version": 2, "elements": ELEMENTS, "appState": {"gridSize": 20}, "files": {}}
+
+def _write(path, text, compressed):
+    if compressed:
+        with gzip.GzipFile(path, "wb", mtime=0) as f:
+            f.write(text.encode())
+    else:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+
+def _read(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    return gzip.decompress(data) if data[:2] == b"\x1f\x8b" else data
+
+def _is_gzip(path):
+    with open(path, "rb") as f:
+        return f.read(2) == b"\x1f\x8b"
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+@pytest.mark.parametrize("compressed", [False, True])
+def test_unchanged_board_is_copied_byte_for_byte(tmp_path, layout, compressed):
+    path = str(tmp_path / "board.excalidraw")
+    text = LAYOUTS[layout](_document())
+    _write(path, text, compressed)
+
+    assert board.patch(path, [board.recolor("#abcdef", "#000000")]) == (0, 3)
+    assert _read(path) == text.encode()
+    assert _is_gzip(path) == compressed
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+@pytest.mark.parametrize("compressed", [False, True])
+def test_patched_elements_change_and_the_rest_stays(tmp_path, layout, compressed):
+    path = str(tmp_path / "board.excalidraw")
+    _write(path, LAYOUTS[layout](_document()), compressed)
+
+    assert board.patch(path, [board.recolor("#4F46E5", "#7c3aed")]) == (2, 3)
+    assert _is_gzip(path) == compressed
+    expected = _document()
+    expected["elements"] = [dict(el) for el in ELEMENTS]
+    expected["elements"][0].update(strokeColor="#7c3aed", version=2)
+    expected["elements"][1].update(backgroundColor="#7c3aed", version=4)
+    assert _read(path) == LAYOUTS[layout](expected).encode()
+    assert list(board.elements(path)) == expected["elements"]
+
+def test_output_suffix_picks_the_compression(tmp_path):
+    path = str(tmp_path / "board.excalidraw")
+    _write(path, LAYOUTS["indented"](_document()), compressed=True)
+
+    board.patch(path, [board.move(5, 0)], output=str(tmp_path / "moved.excalidraw"))
+    board.patch(path, [board.move(5, 0)], output=str(tmp_path / "moved.json.gz"))
+    assert _is_gzip(str(tmp_path / "moved.excalidraw")) # Follows the input
+    assert _is_gzip(str(tmp_path / "moved.json.gz"))
+    assert [el["x"] for el in board.elements(str(tmp_path / "moved.excalidraw"))] == [5, 15, 5]
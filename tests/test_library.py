@@ -0,0 +1,37 @@
+# wireframe.library's expander reads and writes boards the way wireframe.board does
+import gzip
+import json
+
+import pytest
+
+from wireframe import library
+
+PART = {"type": "rectangle", "id": "p", "x": 0, "y": 0, "width": 10, "height": 10}
+ITEMS = [{"id": "item", "status": "unpublished", "created": 0, "name": "card", "elements": [PART]}]
+BOARD = {"type": "excalidraw", "version": 2, "appState": {}, "files": {}, "elements": [
+    {"type": "rectangle", "id": "ref", "x": 30, "y": 40, "width": 10, "height": 10,
+     "customData": {"libraryItem": "item", "name": "card", "origin": [30, 40]}},
+]}
+
+def _write(path, doc, compressed):
+    data = json.dumps(doc).encode()
+    with open(path, "wb") as f:
+        f.write(gzip.compress(data, mtime=0) if compressed else data)
+
+def _read(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    return data[:2] == b"\x1f\x8b", json.loads(gzip.decompress(data) if data[:2] == b"\x1f\x8b" else data)
+
+@pytest.mark.parametrize("compressed", [False, True])
+@pytest.mark.parametrize("output", [None, "full.excalidraw", "full.excalidraw.gz"])
+def test_expand_keeps_the_board_compression(tmp_path, compressed, output):
+    path, lib = str(tmp_path / "board.excalidraw"), str(tmp_path / "board.excalidrawlib")
+    _write(path, BOARD, compressed)
+    _write(lib, {"type": "excalidrawlib", "version": 2, "libraryItems": ITEMS}, compressed)
+    output = str(tmp_path / output) if output else path
+
+    library.main([path, lib, "-o", output])
+    gzipped, doc = _read(output)
+    assert gzipped == (compressed or output.endswith(".gz"))
+    assert [(el["x"], el["y"], el["width"]) for el in doc["elements"]] == [(30, 40, 10)]
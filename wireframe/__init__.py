@@ -0,0 +1 @@
+# Support modules for generate_wireframe.py
@@ -0,0 +1,210 @@
+# Benchmarks for generate_wireframe.py: time, throughput, peak memory and output
+# size per builder and for the whole board, plus synthetic scale-up workloads.
+#
+#   python -m wireframe.bench
+#   python -m wireframe.bench --sizes 100,1000,10000 --compare .wireframe-bench/<commit>.json
+import argparse
+import csv
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import generate_wireframe as gw
+from wireframe.layout import Grid
+
+BENCH_DIR = ".wireframe-bench"
+
+class _ByteCounter:
+    # File-like sink that only counts what the writer produces (the output is ASCII)
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, text):
+        self.bytes += len(text)
+
+# --- Synthetic workloads ---
+
+CATEGORIES = ["Dining Out", "Groceries", "Salary", "Entertainment", "Utilities", "Transport"]
+ACCOUNTS = ["Daily Spending", "Bills Account", "Savings", "Emergency Fund"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+def synthetic_screens(n, columns=4):
+    # The real screens repeated over an n-slot grid
+    builders = [screen[0] for screen in gw.SCREENS]
+    return [(builders[i % len(builders)], (i % columns) * 1600, (i // columns) * 1100) for i in range(n)]
+
+def synthetic_rows(n):
+    rows = []
+    for i in range(n):
+        income = i % 7 == 0
+        rows.append((f"{MONTHS[i // 28 % 12]} {i % 28 + 1}", f"Transaction #{i + 1}", CATEGORIES[i % len(CATEGORIES)],
+                     ACCOUNTS[i % len(ACCOUNTS)], f"{'+' if income else '-'} ${(i * 37) % 900 + 5:,.2f}",
+                     gw.THEME["success" if income else "danger"]))
+    return rows
+
+def synthetic_accounts(n):
+    return [{"name": f"Account {i + 1}", "bal": f"${(i * 113) % 5000:,.2f}", "pct": (i * 17) % 101,
+             "color": gw.THEME["warning" if i % 5 == 4 else "success"]} for i in range(n)]
+
+def synthetic_months(n):
+    # (label, income, spent per SPENDING_CATEGORIES) like build_viz's MONTHLY
+    return [(f"{MONTHS[i % 12]} {i // 12 + 1}", 4000 + (i * 37) % 900,
+             tuple((i * 53 + k * 211) % 1500 for k in range(len(gw.SPENDING_CATEGORIES)))) for i in range(n)]
+
+def synthetic_series(n):
+    # n days of balance with a yearly swing, a trend and day-to-day noise
+    return [(730000 + i, 5000 + i * 0.5 + 2000 * ((i % 365) / 182.5 - 1) ** 2 + (i * 7919) % 300) for i in range(n)]
+
+def synthetic_export(n):
+    # A CSV export in the backend's Prisma shape, written once per size
+    path = os.path.join(BENCH_DIR, f"transactions-{n}.csv")
+    if not os.path.exists(path):
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "type", "accountName", "expenseCategoryName", "amountCents",
+                             "description", "transactionDate"])
+            for i in range(n):
+                income = i % 7 == 0
+                writer.writerow([f"tx-{i}", "INCOME" if income else "EXPENSE", ACCOUNTS[i % len(ACCOUNTS)],
+                                 "" if income else CATEGORIES[i % len(CATEGORIES)], (i * 3701) % 90000 + 500,
+                                 f"Transaction #{i + 1}", f"2024-{i // 28 % 12 + 1:02d}-{i % 28 + 1:02d}T12:00:00.000Z"])
+    return path
+
+def layout_grid(start_x, start_y, accounts, resizes=0):
+    # Every account card in one layout grid (no fold), after `resizes` single
+    # card height changes that are each re-measured before the final placement
+    grid = Grid([gw.account_card(acc) for acc in accounts], gw.ACCOUNT_COLUMNS, gap=(40, 30))
+    grid.size()
+    for i in range(resizes):
+        grid.children[i * 7919 % len(grid.children)].resize(height=150 + i % 3 * 10)
+        grid.size()
+    yield from grid.place(start_x, start_y)
+
+WORKLOADS = {
+    "screens": synthetic_screens,
+    "history_rows": lambda n: [(gw.build_history, 0, 0, synthetic_rows(n))],
+    "account_cards": lambda n: [(gw.build_dashboard, 0, 0, synthetic_accounts(n), False)], # All n cards, not just the fold
+    "layout_grid": lambda n: [(layout_grid, 0, 0, synthetic_accounts(n))],
+    "relayout": lambda n: [(layout_grid, 0, 0, synthetic_accounts(n), 100)],
+    "viz_months": lambda n: [(gw.build_viz, 0, 0, synthetic_months(n), gw.SPENDING_CATEGORIES)],
+    "viz_series": lambda n: [(gw.build_viz, 0, 0, None, None, synthetic_series(n))],
+    "transaction_pages": lambda n: list(gw.history_pages(synthetic_export(n), screens=[])),
+}
+
+# --- Measurement ---
+
+def measure(name, screens, repeat=3):
+    # Best-of-`repeat` build and write times without tracing, then one traced
+    # streaming run (as main() does it) for peak memory
+    build = float("inf")
+    for _ in range(repeat):
+        gw.clear_components()
+        start = time.perf_counter()
+        fragments = [gw.build_screen(screen) for screen in screens]
+        build = min(build, time.perf_counter() - start)
+    count = sum(map(len, fragments))
+
+    sink = _ByteCounter()
+    start = time.perf_counter()
+    gw.write_scene(sink, itertools.chain.from_iterable(fragments))
+    write = time.perf_counter() - start
+    del fragments
+
+    gw.clear_components()
+    tracemalloc.start()
+    gw.write_scene(_ByteCounter(), itertools.chain.from_iterable(gw.build_screen(s) for s in screens))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "name": name,
+        "elements": count,
+        "build_seconds": build,
+        "write_seconds": write,
+        "elements_per_second": count / (build + write) if build + write else 0,
+        "peak_bytes": peak,
+        "output_bytes": sink.bytes,
+    }
+
+def run(sizes, repeat=3, workloads=WORKLOADS):
+    gw.configure(deterministic=True) # Same random bar heights on every run
+    results = [measure(gw.screen_name(screen), [screen], repeat) for screen in gw.SCREENS]
+    results.append(measure("board", gw.SCREENS, repeat))
+    for workload, make in workloads.items():
+        for n in sizes:
+            results.append(measure(f"{workload}[{n}]", make(n), repeat))
+    return results
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+# --- Reporting ---
+
+def format_table(results, baseline=None):
+    previous = {r["name"]: r for r in baseline["results"]} if baseline else {}
+    lines = [f"{'benchmark':<32}{'elements':>10}{'build ms':>11}{'write ms':>11}{'el/s':>12}{'peak KiB':>11}{'out KiB':>10}"]
+    for r in results:
+        line = (f"{r['name']:<32}{r['elements']:>10}{r['build_seconds'] * 1000:>11.2f}{r['write_seconds'] * 1000:>11.2f}"
+                f"{r['elements_per_second']:>12.0f}{r['peak_bytes'] / 1024:>11.1f}{r['output_bytes'] / 1024:>10.1f}")
+        old = previous.get(r["name"])
+        if old:
+            line += "  " + "  ".join(_change(label, r[key], old[key]) for label, key in
+                                     (("time", "build_seconds"), ("peak", "peak_bytes"), ("out", "output_bytes")))
+        lines.append(line)
+    return "\n".join(lines)
+
+def _change(label, new, old):
+    return f"{label} {(new - old) / old * 100:+.0f}%" if old else f"{label} n/a"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the wireframe generator.")
+    parser.add_argument("--sizes", default="10,100,1000",
+                        help="comma-separated N for the synthetic workloads (default: 10,100,1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per benchmark, best is kept")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS),
+                        help=f"synthetic workloads to run (default: {','.join(WORKLOADS)})")
+    parser.add_argument("--json", metavar="PATH", help=f"where to store results (default: {BENCH_DIR}/<commit>.json)")
+    parser.add_argument("--compare", metavar="PATH", help="results JSON of an earlier commit to compare against")
+    args = parser.parse_args(argv)
+
+    sizes = [int(n) for n in args.sizes.split(",") if n]
+    workloads = {name: WORKLOADS[name] for name in args.workloads.split(",") if name}
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    commit = _git_commit()
+    results = run(sizes, args.repeat, workloads)
+    print(format_table(results, baseline))
+    if baseline:
+        print(f"(compared with {baseline.get('commit', args.compare)})")
+
+    path = args.json or os.path.join(BENCH_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "sizes": sizes,
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
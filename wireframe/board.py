@@ -0,0 +1,220 @@
+# Streaming access to existing .excalidraw boards. Elements are decoded one at
+# a time from the "elements" array, so queries and patches on large boards
+# never hold the whole document. Patches are written back as a stream: every
+# byte outside the patched elements is copied through unchanged.
+#
+#   python -m wireframe.board BOARD --screen 1600,0 --count
+#   python -m wireframe.board BOARD --recolor '#4f46e5=#7c3aed'
+#   python -m wireframe.board BOARD --screen 4800,0 --move 0,1100
+import argparse
+import gzip
+import io
+import json
+import os
+import shutil
+import sys
+
+from wireframe.jsonstream import Scanner
+from wireframe.spatial import contains, element_bbox, intersects
+
+COMPRESSED_SUFFIX = {"gzip": ".gz", "zstd": ".zst"}
+COMPRESSED_MAGIC = {b"\x1f\x8b": ".gz", b"\x28\xb5\x2f\xfd": ".zst"}
+
+def _sniff(path):
+    # The suffix matching a board's actual compression, whatever its name says
+    with open(path, "rb") as f:
+        head = f.read(4)
+    return next((suffix for magic, suffix in COMPRESSED_MAGIC.items() if head.startswith(magic)), "")
+
+def compression_like(path, output):
+    # open_board's `compress` for writing `output` compressed like `path`,
+    # unless `output` has a .gz/.zst suffix of its own
+    if os.path.splitext(output)[1] in COMPRESSED_SUFFIX.values():
+        return None
+    return {suffix: name for name, suffix in COMPRESSED_SUFFIX.items()}.get(_sniff(path), "")
+
+def open_board(path, mode="r", compress=None):
+    # Text stream over a board, (de)compressed on the fly. Reads go by the
+    # file's magic bytes; writes by `compress` ("gzip", "zstd" or "" for
+    # none), or by the .gz/.zst suffix when it isn't given.
+    if mode == "r":
+        kind = _sniff(path)
+    else:
+        kind = os.path.splitext(path)[1] if compress is None else COMPRESSED_SUFFIX.get(compress, "")
+    if kind == ".gz":
+        # mtime=0 keeps the compressed bytes reproducible between runs
+        return io.TextIOWrapper(gzip.GzipFile(path, mode + "b", mtime=0), encoding="utf-8")
+    if kind == ".zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise SystemExit(".zst boards need the zstandard package (pip install zstandard)")
+        return zstandard.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8", newline="")
+
+def _seek_elements(scanner):
+    # Leaves the scanner just inside the document's "elements" array
+    scanner.expect("{")
+    if not scanner.seek_key("elements"):
+        raise ValueError("not an Excalidraw board: no \"elements\" array")
+    scanner.expect("[")
+
+def elements(path):
+    # Every element dict of a board, deleted ones included, in document order
+    with open_board(path) as f:
+        scanner = Scanner(f)
+        _seek_elements(scanner)
+        yield from scanner.items()
+
+# --- Queries ---
+
+def where(type=None, within=None, overlaps=None, group=None, color=None):
+    # Predicate for live elements matching all the given filters. Boxes are
+    # (x0, y0, x1, y1); colors match stroke or background, ignoring case.
+    color = color and color.lower()
+    def match(el):
+        if el.get("isDeleted"):
+            return False
+        if type and el.get("type") != type:
+            return False
+        if group and group not in (el.get("groupIds") or ()):
+            return False
+        if color and color not in (str(el.get("strokeColor")).lower(), str(el.get("backgroundColor")).lower()):
+            return False
+        if within or overlaps:
+            box = element_bbox(el)
+            if within and not contains(within, box):
+                return False
+            if overlaps and not intersects(overlaps, box):
+                return False
+        return True
+    return match
+
+def query(path, **filters):
+    match = where(**filters)
+    for el in elements(path):
+        if match(el):
+            yield el
+
+def screen_box(path, x, y):
+    # Bounding box of the screen frame (the biggest rectangle) with its top-left corner at (x, y)
+    frames = [element_bbox(el) for el in query(path, type="rectangle") if el["x"] == x and el["y"] == y]
+    if not frames:
+        raise ValueError(f"no screen frame at {x},{y}")
+    return max(frames, key=lambda box: (box[2] - box[0]) * (box[3] - box[1]))
+
+# --- Patches ---
+# An edit changes an element dict in place and returns True if it did.
+
+def recolor(old, new):
+    old = old.lower()
+    def edit(el):
+        changed = False
+        for field in ("strokeColor", "backgroundColor"):
+            if str(el.get(field)).lower() == old:
+                el[field] = new
+                changed = True
+        return changed
+    return edit
+
+def move(dx, dy):
+    def edit(el):
+        el["x"] += dx
+        el["y"] += dy
+        return bool(dx or dy)
+    return edit
+
+def only(match, edit):
+    # Restricts an edit to the elements `match` accepts
+    return lambda el: match(el) and edit(el)
+
+def _encode_like(el, raw):
+    # Re-encodes a patched element in the layout of its original text
+    separators = (",", ": ") if '": ' in raw else (",", ":")
+    if "\n" not in raw:
+        return json.dumps(el, separators=separators)
+    lines = raw.split("\n")
+    outer = lines[-1][:len(lines[-1]) - len(lines[-1].lstrip())]
+    inner = lines[1][:len(lines[1]) - len(lines[1].lstrip())]
+    return json.dumps(el, indent=inner[len(outer):], separators=separators).replace("\n", "\n" + outer)
+
+def patch(path, edits, output=None):
+    # Applies every edit to every element and streams the board out. Patched
+    # elements get their version bumped so Excalidraw picks them up; everything
+    # else is copied byte for byte. The result goes to `output`
+    # (default: back over `path`), compressed like `path` unless `output` has
+    # a .gz/.zst suffix of its own.
+    # Returns (patched, total) element counts.
+    output = output or path
+    root, ext = os.path.splitext(output)
+    tmp = f"{root}.tmp{ext}"
+    patched = total = 0
+    with open_board(path) as f, open_board(tmp, "w", compression_like(path, output)) as out:
+        scanner = Scanner(f)
+        scanner.mark = 0
+        _seek_elements(scanner)
+        while scanner.peek() != "]":
+            out.write(scanner.take()) # Everything up to the element: header, separators, indentation
+            el = scanner.value()
+            raw = scanner.take()
+            if any([edit(el) for edit in edits]):
+                el["version"] = el.get("version", 1) + 1
+                raw = _encode_like(el, raw)
+                patched += 1
+            out.write(raw)
+            total += 1
+            if scanner.peek() == ",":
+                scanner.pos += 1
+        out.write(scanner.take() + scanner.rest())
+        shutil.copyfileobj(f, out)
+    os.replace(tmp, output)
+    return patched, total
+
+# --- Command line ---
+
+def _numbers(text, count):
+    values = [float(v) for v in text.split(",")]
+    if len(values) != count:
+        raise argparse.ArgumentTypeError(f"expected {count} comma-separated numbers, got {text!r}")
+    return [int(v) if v.is_integer() else v for v in values]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query or patch an Excalidraw board without loading it whole.")
+    parser.add_argument("board")
+    parser.add_argument("--type", help="only elements of this type (rectangle, text, ...)")
+    parser.add_argument("--within", type=lambda t: _numbers(t, 4), metavar="X0,Y0,X1,Y1",
+                        help="only elements entirely inside this box")
+    parser.add_argument("--overlaps", type=lambda t: _numbers(t, 4), metavar="X0,Y0,X1,Y1",
+                        help="only elements overlapping this box")
+    parser.add_argument("--screen", type=lambda t: _numbers(t, 2), metavar="X,Y",
+                        help="only elements of the screen whose frame starts at X,Y")
+    parser.add_argument("--group", help="only elements in this group id")
+    parser.add_argument("--color", help="only elements with this stroke or background color")
+    parser.add_argument("--count", action="store_true", help="print the number of matches instead of the elements")
+    parser.add_argument("--recolor", action="append", default=[], metavar="OLD=NEW",
+                        help="replace a color on the matching elements (repeatable)")
+    parser.add_argument("--move", type=lambda t: _numbers(t, 2), metavar="DX,DY",
+                        help="move the matching elements")
+    parser.add_argument("-o", "--output", help="write the patched board here instead of over BOARD")
+    args = parser.parse_args(argv)
+
+    overlaps = args.overlaps
+    if args.screen:
+        overlaps = screen_box(args.board, *args.screen)
+    match = where(type=args.type, within=args.within, overlaps=overlaps, group=args.group, color=args.color)
+    edits = [recolor(*pair.split("=", 1)) for pair in args.recolor]
+    if args.move:
+        edits.append(move(*args.move))
+
+    if edits:
+        patched, total = patch(args.board, [only(match, lambda el: any([edit(el) for edit in edits]))], args.output)
+        print(f"Patched {patched} of {total} elements -> {args.output or args.board}")
+    elif args.count:
+        print(sum(1 for el in elements(args.board) if match(el)))
+    else:
+        for el in elements(args.board):
+            if match(el):
+                sys.stdout.write(json.dumps(el) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# Chart geometry for the visualization screen: pie slices as arc polygons,
+# grouped/stacked bar rectangles, and line series downsampled with LTTB
+# (Largest-Triangle-Three-Buckets) so a screen stays small at any data size.
+#
+# Everything is computed in chart-local pixels (origin top-left, y down) and
+# rounded to 0.01 px. NumPy is used when installed; the pure-Python fallback
+# does the same float operations in the same order, so both produce the same
+# output.
+import itertools
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def _round(values):
+    return [round(v, 2) for v in values]
+
+def _pad(groups):
+    # Short stacks padded with zero segments, so every group has the same shape
+    depth = max(len(stack) for group in groups for stack in group)
+    return [[list(stack) + [0] * (depth - len(stack)) for stack in group] for group in groups]
+
+def nice_ceiling(value):
+    # Smallest 1, 2, 2.5 or 5 x 10^k that is >= value; keeps axis ticks readable
+    if value <= 0:
+        return 1
+    magnitude = 10 ** math.floor(math.log10(value))
+    for step in (1, 2, 2.5, 5, 10):
+        if step * magnitude >= value:
+            return step * magnitude
+
+# --- Pie ---
+
+def pie_slices(values, radius, steps=96):
+    # [(polygon points around the centre, label anchor, fraction)] clockwise
+    # from 12 o'clock. Each arc gets a share of `steps` segments by its angle.
+    total = float(sum(values))
+    if total <= 0:
+        return []
+    slices = []
+    start = -math.pi / 2
+    for value in values:
+        fraction = value / total
+        end = start + fraction * 2 * math.pi
+        n = max(2, math.ceil(steps * fraction) + 1)
+        if np is not None:
+            angles = np.linspace(start, end, n)
+            xs, ys = (radius * np.cos(angles)).tolist(), (radius * np.sin(angles)).tolist()
+        else:
+            step = (end - start) / (n - 1)
+            angles = [i * step + start for i in range(n - 1)] + [end]
+            xs, ys = [radius * math.cos(a) for a in angles], [radius * math.sin(a) for a in angles]
+        points = [[0, 0]] + [[x, y] for x, y in zip(_round(xs), _round(ys))] + [[0, 0]]
+        middle = (start + end) / 2
+        anchor = (round(radius * 0.62 * math.cos(middle), 2), round(radius * 0.62 * math.sin(middle), 2))
+        slices.append((points, anchor, fraction))
+        start = end
+    return slices
+
+# --- Bars ---
+
+def rebin(labels, groups, max_groups):
+    # Merges runs of consecutive groups (summing every value) until at most
+    # `max_groups` remain; each run is labelled by its first group
+    if len(groups) <= max_groups:
+        return list(labels), _pad(groups)
+    size = math.ceil(len(groups) / max_groups)
+    if np is not None:
+        values = np.array(_pad(groups), dtype=float)
+        values = np.concatenate([values, np.zeros((-len(values) % size,) + values.shape[1:])])
+        merged = values.reshape(-1, size, *values.shape[1:]).sum(axis=1).tolist()
+    else:
+        padded = _pad(groups)
+        merged = [[[float(sum(segment)) for segment in zip(*stacks)] for stacks in zip(*padded[i:i + size])]
+                  for i in range(0, len(padded), size)]
+    return list(labels[::size]), merged
+
+def bar_rects(groups, width, height, top=None, gap=0.3, column_gap=4):
+    # groups[g][c] is a stack of segment values for column c of group g
+    # (one column per series, one segment per stacked part). Returns
+    # rects[g][c][s] = (x, y, w, h) with the baseline at y = height; zero
+    # segments come back with h = 0. `top` is the value at the top edge.
+    if not groups:
+        return []
+    columns = len(groups[0])
+    slot = width / len(groups)
+    bar = max(1.0, (slot * (1 - gap) - column_gap * (columns - 1)) / columns)
+    if np is not None:
+        values = np.array(_pad(groups), dtype=float)
+        top = top or float(values.sum(axis=2).max()) or 1
+        tops = (height - np.cumsum(values / top * height, axis=2)).tolist()
+        xs = ((np.arange(len(groups)) * slot + slot * gap / 2)[:, None] + np.arange(columns) * (bar + column_gap)).tolist()
+    else:
+        top = top or max(sum(stack) for group in groups for stack in group) or 1
+        tops = [[[height - y for y in itertools.accumulate(v / top * height for v in stack)] for stack in group]
+                for group in _pad(groups)]
+        xs = [[g * slot + slot * gap / 2 + c * (bar + column_gap) for c in range(columns)] for g in range(len(groups))]
+    return [[_stack(x, bar, height, stack) for x, stack in zip(row, group)] for row, group in zip(xs, tops)]
+
+def _stack(x, bar, height, tops):
+    # Rounded rects of one stack; each segment starts exactly where the one below ends
+    edges = [round(height, 2)] + _round(tops)
+    return [[round(x, 2), y, round(bar, 2), round(bottom - y, 2)] for bottom, y in zip(edges, edges[1:])]
+
+# --- Lines ---
+
+def lttb(xs, ys, threshold):
+    # Indices of `threshold` points that keep the visual shape of the series:
+    # first and last, plus per bucket the point spanning the largest triangle
+    # with the previous pick and the next bucket's average
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    edges = [1 + (n - 2) * i // (threshold - 2) for i in range(threshold - 1)] + [n]
+    picks = [0]
+    a = 0
+    if np is not None:
+        x, y = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+        bounds = np.array(edges)
+        cx, cy = np.concatenate([[0], np.cumsum(x)]), np.concatenate([[0], np.cumsum(y)])
+        counts = bounds[1:] - bounds[:-1]
+        avg_x = ((cx[bounds[1:]] - cx[bounds[:-1]]) / counts).tolist()
+        avg_y = ((cy[bounds[1:]] - cy[bounds[:-1]]) / counts).tolist()
+        for i in range(threshold - 2):
+            lo, hi = edges[i], edges[i + 1]
+            nx, ny = avg_x[i + 1], avg_y[i + 1]
+            area = np.abs((x[a] - nx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (ny - y[a]))
+            a = lo + int(area.argmax())
+            picks.append(a)
+    else:
+        xs, ys = [float(v) for v in xs], [float(v) for v in ys]
+        cx, cy = [0.0, *itertools.accumulate(xs)], [0.0, *itertools.accumulate(ys)]
+        for i in range(threshold - 2):
+            lo, hi, end = edges[i], edges[i + 1], edges[i + 2]
+            nx, ny = (cx[end] - cx[hi]) / (end - hi), (cy[end] - cy[hi]) / (end - hi)
+            ax, ay = xs[a], ys[a]
+            a = max(range(lo, hi), key=lambda j: abs((ax - nx) * (ys[j] - ay) - (ax - xs[j]) * (ny - ay)))
+            picks.append(a)
+    picks.append(n - 1)
+    return picks
+
+def line_points(xs, ys, width, height, max_points, y_range=None):
+    # Series scaled into a width x height box (y up), at most max_points long
+    keep = lttb(xs, ys, max_points)
+    x0, x1 = xs[0], xs[-1]
+    low, high = y_range or (min(ys), max(ys))
+    sx = width / ((x1 - x0) or 1)
+    sy = height / ((high - low) or 1)
+    if np is not None:
+        keep = np.asarray(keep)
+        px = (np.asarray(xs, dtype=float)[keep] - x0) * sx
+        py = height - (np.asarray(ys, dtype=float)[keep] - low) * sy
+        return [_round(point) for point in np.stack([px, py], axis=1).tolist()]
+    return [[round((xs[i] - x0) * sx, 2), round(height - (ys[i] - low) * sy, 2)] for i in keep]
@@ -0,0 +1,100 @@
+# Incremental JSON scanning over a text stream: values are decoded one at a
+# time with json.JSONDecoder.raw_decode over a sliding buffer, so only the
+# value being decoded is held in memory. The raw text of what was consumed can
+# be taken back out, which lets a writer copy untouched parts byte for byte.
+import json
+
+CHUNK_SIZE = 64 * 1024
+
+class Scanner:
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.mark = None # Start of the text take() returns; None drops consumed text
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        keep = self.pos if self.mark is None else self.mark
+        self.buf = self.buf[keep:] + chunk
+        self.pos -= keep
+        if self.mark is not None:
+            self.mark = 0
+        return True
+
+    def take(self):
+        # The raw text consumed since the previous take()
+        text = self.buf[self.mark:self.pos]
+        self.mark = self.pos
+        return text
+
+    def rest(self):
+        # The unconsumed text left in the buffer; the stream continues after it
+        text = self.buf[self.pos:]
+        self.pos = len(self.buf)
+        return text
+
+    def peek(self):
+        # Next non-whitespace character, "" at the end of the input
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"expected {char!r}, found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number that ends the buffer may go on in the next chunk
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def items(self):
+        # Values of an array whose "[" was just consumed
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == "]":
+                self.pos += 1
+                return
+            self.expect(",")
+
+    def array(self):
+        self.expect("[")
+        yield from self.items()
+
+    def seek_key(self, wanted):
+        # Skips the members of an object whose "{" was just consumed up to the
+        # value of `wanted`; False if the object has no such key
+        while self.peek() != "}":
+            key = self.value()
+            self.expect(":")
+            if key == wanted:
+                return True
+            self.value()
+            if self.peek() == ",":
+                self.pos += 1
+        return False
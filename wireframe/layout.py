@@ -0,0 +1,221 @@
+# Declarative layout for the builders: rows, columns, grids, padding and
+# alignment instead of hand-computed offsets. Leaves wrap a draw callback
+# (a few create_* calls at a given box), so the tree decides where things go
+# and the callbacks decide what they look like.
+#
+# Every node memoizes its size and its children's offsets per width
+# constraint. Changing a node (Leaf.resize, Container.replace...) drops the
+# cache of that node and its ancestors only, so the next place() re-measures
+# one path up the tree and reuses every sibling subtree as it was.
+#
+#   cards = Grid([Leaf(400, 150, draw_card) for _ in accounts], columns=3, gap=(40, 30))
+#   yield from Padding(cards, 40).place(x, y)
+import math
+
+INF = math.inf
+
+class Node:
+    __slots__ = ("parent", "_cache")
+
+    def __init__(self):
+        self.parent = None
+        self._cache = {} # max width -> ((width, height), [(dx, dy, child max width)])
+
+    def invalidate(self):
+        node = self
+        while node is not None:
+            node._cache = {}
+            node = node.parent
+
+    def measure(self, max_width=INF):
+        entry = self._cache.get(max_width)
+        if entry is None:
+            entry = self._cache[max_width] = self._measure(max_width)
+        return entry
+
+    def size(self, max_width=INF):
+        return self.measure(max_width)[0]
+
+    def place(self, x, y, max_width=INF):
+        # Elements of the subtree with its top-left corner at (x, y), in tree order
+        _, offsets = self.measure(max_width)
+        for child, (dx, dy, width) in zip(self.children, offsets):
+            yield from child.place(x + dx, y + dy, width)
+
+class Leaf(Node):
+    # A fixed-size box; draw(x, y, width, height) yields its elements. Without
+    # draw it is a spacer.
+    __slots__ = ("width", "height", "draw")
+    children = ()
+
+    def __init__(self, width, height, draw=None):
+        super().__init__()
+        self.width = width
+        self.height = height
+        self.draw = draw
+
+    def resize(self, width=None, height=None):
+        self.width = self.width if width is None else width
+        self.height = self.height if height is None else height
+        self.invalidate()
+
+    def _measure(self, max_width):
+        return (self.width, self.height), []
+
+    def place(self, x, y, max_width=INF):
+        if self.draw is not None:
+            yield from self.draw(x, y, self.width, self.height)
+
+class Container(Node):
+    __slots__ = ("children",)
+
+    def __init__(self, children):
+        super().__init__()
+        self.children = []
+        for child in children:
+            self._adopt(child)
+            self.children.append(child)
+
+    def _adopt(self, child):
+        if child.parent is not None:
+            raise ValueError("layout node already has a parent")
+        child.parent = self
+
+    def append(self, child):
+        self._adopt(child)
+        self.children.append(child)
+        self.invalidate()
+
+    def replace(self, index, child):
+        self._adopt(child)
+        self.children[index].parent = None
+        self.children[index] = child
+        self.invalidate()
+
+    def remove(self, index):
+        self.children.pop(index).parent = None
+        self.invalidate()
+
+ALIGN = {"start": 0, "center": 0.5, "end": 1}
+
+def _shift(free, align):
+    # Offset of an item in `free` spare pixels; whole pixels stay ints
+    return 0 if not free or align == "start" else free * ALIGN[align]
+
+class Row(Container):
+    # Children left to right, `gap` apart and aligned vertically within the
+    # row. With wrap, a child that would pass max_width starts a new line
+    # `row_gap` below (the first child of a line is always placed).
+    __slots__ = ("gap", "align", "wrap", "row_gap")
+
+    def __init__(self, children, gap=0, align="start", wrap=False, row_gap=0):
+        super().__init__(children)
+        self.gap = gap
+        self.align = align
+        self.wrap = wrap
+        self.row_gap = row_gap
+
+    def _measure(self, max_width):
+        lines = [[]]
+        x = 0
+        for child in self.children:
+            w, h = child.size()
+            if self.wrap and lines[-1] and x + w > max_width:
+                lines.append([])
+                x = 0
+            lines[-1].append((x, w, h))
+            x += w + self.gap
+        offsets = []
+        width = height = 0
+        for line in lines:
+            line_height = max((h for _, _, h in line), default=0)
+            offsets += [(x, height + _shift(line_height - h, self.align), INF) for x, _, h in line]
+            if line:
+                width = max(width, line[-1][0] + line[-1][1])
+            height += line_height + self.row_gap
+        return (width, max(0, height - self.row_gap)), offsets
+
+class Column(Container):
+    # Children top to bottom, `gap` apart and aligned horizontally within the
+    # column; children get the column's max_width, so wrapping rows inside it wrap
+    __slots__ = ("gap", "align")
+
+    def __init__(self, children, gap=0, align="start"):
+        super().__init__(children)
+        self.gap = gap
+        self.align = align
+
+    def _measure(self, max_width):
+        sizes = [child.size(max_width) for child in self.children]
+        width = max((w for w, _ in sizes), default=0)
+        offsets = []
+        y = 0
+        for w, h in sizes:
+            offsets.append((_shift(width - w, self.align), y, max_width))
+            y += h + self.gap
+        return (width, max(0, y - self.gap)), offsets
+
+class Grid(Container):
+    # Children in `columns` columns of equal cells (the largest child, unless
+    # `cell` is given), filled row by row. gap is one number or (column, row).
+    __slots__ = ("columns", "gap", "cell")
+
+    def __init__(self, children, columns, gap=0, cell=None):
+        super().__init__(children)
+        self.columns = max(1, columns)
+        self.gap = gap if isinstance(gap, tuple) else (gap, gap)
+        self.cell = cell
+
+    def _measure(self, max_width):
+        sizes = [child.size() for child in self.children]
+        cw, ch = self.cell or (max((w for w, _ in sizes), default=0), max((h for _, h in sizes), default=0))
+        gx, gy = self.gap
+        offsets = [(i % self.columns * (cw + gx), i // self.columns * (ch + gy), cw) for i in range(len(sizes))]
+        columns = min(self.columns, len(sizes))
+        rows = -(-len(sizes) // self.columns)
+        return (max(0, columns * (cw + gx) - gx), max(0, rows * (ch + gy) - gy)), offsets
+
+class Padding(Container):
+    # Space around one child: pad is one number, (vertical, horizontal) or (top, right, bottom, left)
+    __slots__ = ("pad",)
+
+    def __init__(self, child, pad):
+        super().__init__([child])
+        if not isinstance(pad, tuple):
+            pad = (pad,) * 4
+        elif len(pad) == 2:
+            pad = pad * 2
+        self.pad = pad
+
+    def _measure(self, max_width):
+        top, right, bottom, left = self.pad
+        w, h = self.children[0].size(max_width - left - right)
+        return (left + w + right, top + h + bottom), [(left, top, max_width - left - right)]
+
+class Align(Container):
+    # One child positioned in a width x height box at fractions (x, y) of the
+    # spare space: (0, 0) top-left, (0.5, 0.5) centred. An unset width takes
+    # max_width (the child's width if unbounded), an unset height the child's.
+    # snap floors offsets to whole pixels.
+    __slots__ = ("width", "height", "x", "y", "snap")
+
+    def __init__(self, child, width=None, height=None, x=0.0, y=0.0, snap=False):
+        super().__init__([child])
+        self.width = width
+        self.height = height
+        self.x = x
+        self.y = y
+        self.snap = snap
+
+    def _measure(self, max_width):
+        width = self.width if self.width is not None else max_width
+        w, h = self.children[0].size(width)
+        width = w if width == INF else width
+        height = h if self.height is None else self.height
+        dx, dy = (width - w) * self.x, (height - h) * self.y
+        if self.snap:
+            dx, dy = math.floor(dx), math.floor(dy)
+        return (width, height), [(dx, dy, width)]
+
+def Center(child, width=None, height=None, snap=False):
+    return Align(child, width, height, 0.5, 0.5, snap)
@@ -0,0 +1,152 @@
+# Deduplicated boards: every component instance on the board (the browser
+# chrome, the sidebar, the dashboard behind the modals) is written once as an
+# item of an .excalidrawlib library, and replaced on the board by one dashed
+# placeholder rectangle whose customData names the item and where it goes.
+# Instances are matched by content relative to their origin, so two calls
+# only share an item when they drew exactly the same thing.
+#
+# Excalidraw opens both files (the library through "Open library"); expand()
+# turns a deduplicated board back into a full one (.gz/.zst boards included).
+#
+#   python -m wireframe.library wireframe.excalidraw wireframe.excalidrawlib -o full.excalidraw
+import argparse
+import hashlib
+import itertools
+import json
+
+from wireframe.board import compression_like, open_board
+from wireframe.spatial import element_bbox
+
+# Fields that differ between instances of one component without changing what it draws
+VOLATILE = ("id", "seed", "versionNonce", "updated")
+
+def _dict(el):
+    return el.to_dict() if hasattr(el, "to_dict") else el
+
+def relative(elements, ox, oy):
+    # Element dicts positioned relative to (ox, oy)
+    out = []
+    for el in elements:
+        el = dict(_dict(el))
+        el["x"] -= ox
+        el["y"] -= oy
+        out.append(el)
+    return out
+
+def signature(elements):
+    digest = hashlib.sha1()
+    for el in elements:
+        digest.update(json.dumps({k: v for k, v in el.items() if k not in VOLATILE}, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+def reference(elements, item, origin):
+    # Placeholder for one instance: its bounding box, carrying the item id and the instance origin
+    first = _dict(elements[0])
+    boxes = [element_bbox(el) for el in elements]
+    x0, y0 = min(b[0] for b in boxes), min(b[1] for b in boxes)
+    x1, y1 = max(b[2] for b in boxes), max(b[3] for b in boxes)
+    return {
+        "type": "rectangle",
+        "version": 1,
+        "versionNonce": first["versionNonce"],
+        "isDeleted": False,
+        "id": first["id"],
+        "fillStyle": "solid",
+        "strokeWidth": 1,
+        "strokeStyle": "dashed",
+        "roughness": 0,
+        "opacity": 100,
+        "angle": 0,
+        "x": x0,
+        "y": y0,
+        "width": x1 - x0,
+        "height": y1 - y0,
+        "strokeColor": "#adb5bd",
+        "backgroundColor": "transparent",
+        "groupIds": [],
+        "roundness": None,
+        "seed": first["seed"],
+        "boundElements": [],
+        "updated": first["updated"],
+        "link": None,
+        "locked": False,
+        "customData": {"libraryItem": item["id"], "name": item["name"], "origin": list(origin)},
+    }
+
+class Library:
+    def __init__(self, instance_of, encode, separator=0):
+        # instance_of(el) gives (name, x, y) of the component call an element
+        # came from, or None; encode(el) its text in the board and `separator`
+        # the length of what goes between two elements there (for the byte count)
+        self.instance_of = instance_of
+        self.encode = encode
+        self.separator = separator
+        self.items = {} # signature -> library item
+        self.instances = 0
+        self.saved = 0 # Board bytes the references saved, before the library is written
+
+    def dedupe(self, elements):
+        # Streams elements through, one reference in place of each component instance
+        for instance, run in itertools.groupby(elements, self.instance_of):
+            if instance is None:
+                yield from run
+                continue
+            run = list(run)
+            name, ox, oy = instance
+            content = relative(run, ox, oy)
+            key = signature(content)
+            item = self.items.get(key)
+            if item is None:
+                item = self.items[key] = {"id": key, "status": "unpublished", "created": content[0]["updated"],
+                                          "name": name, "elements": content}
+            ref = reference(run, item, (ox, oy))
+            self.instances += 1
+            self.saved += (sum(len(self.encode(el)) for el in run) + (len(run) - 1) * self.separator
+                           - len(self.encode(ref)))
+            yield ref
+
+    def write(self, f, compact=False):
+        # Writes the .excalidrawlib document and returns its length, which comes off `saved`
+        text = json.dumps({"type": "excalidrawlib", "version": 2, "source": "https://excalidraw.com",
+                           "libraryItems": list(self.items.values())},
+                          indent=None if compact else 2, separators=(",", ":") if compact else (",", ": "))
+        f.write(text)
+        self.saved -= len(text)
+        return len(text)
+
+def expand(elements, items):
+    # The full board: each reference replaced by its item's elements at the
+    # reference's origin, with ids derived from the reference's id
+    for el in elements:
+        data = el.get("customData") or {}
+        item = items.get(data.get("libraryItem"))
+        if item is None:
+            yield el
+            continue
+        ox, oy = data["origin"]
+        for part in item["elements"]:
+            part = dict(part)
+            part["id"] = hashlib.sha1(f"{el['id']}/{part['id']}".encode()).hexdigest()[:16]
+            part["x"] += ox
+            part["y"] += oy
+            yield part
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Expand a deduplicated board with its library.")
+    parser.add_argument("board")
+    parser.add_argument("library")
+    parser.add_argument("-o", "--output", help="where to write the full board (default: over BOARD)")
+    args = parser.parse_args(argv)
+
+    output = args.output or args.board
+    with open_board(args.library) as f:
+        items = {item["id"]: item for item in json.load(f)["libraryItems"]}
+    with open_board(args.board) as f:
+        document = json.load(f)
+    document["elements"] = list(expand(document["elements"], items))
+    with open_board(output, "w", compression_like(args.board, output)) as f:
+        json.dump(document, f, indent=2)
+    print(f"Expanded to {len(document['elements'])} elements -> {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Layout lint over generated screens: overlapping screens, elements outside
+# their frame, text running past its container and partially overlapping shapes
+import collections
+
+from wireframe.spatial import GridIndex, contains, element_bbox
+
+Violation = collections.namedtuple("Violation", "kind screen id message")
+
+SHAPES = ("rectangle", "ellipse")
+
+def _fmt(box):
+    return "(%g, %g)-(%g, %g)" % tuple(round(v, 1) for v in box)
+
+def _crossing(a, b, tolerance=0.5):
+    # Shared edges and sub-pixel rounding (stacked bars) don't count as overlaps
+    return min(a[2], b[2]) - max(a[0], b[0]) > tolerance and min(a[3], b[3]) - max(a[1], b[1]) > tolerance
+
+class Linter:
+    # Screens are fed one at a time, so linting streams alongside generation.
+    # The first element of a screen is taken to be its frame (build_screen_frame).
+
+    def __init__(self):
+        self.frames = GridIndex(cell_size=2048)
+        self.violations = []
+
+    def check(self, names, fragments):
+        # Passes fragments through unchanged while linting them
+        for name, fragment in zip(names, fragments):
+            self.add_screen(name, fragment)
+            yield fragment
+
+    def add_screen(self, name, elements):
+        if not elements:
+            return []
+        found = []
+        frame = element_bbox(elements[0])
+
+        for other in self.frames.query(frame):
+            found.append(Violation("screen-overlap", name, elements[0].get("id"),
+                                   f"frame {_fmt(frame)} overlaps screen {other}"))
+        self.frames.insert(name, frame)
+
+        # Elements are checked in paint order against the shapes painted before them
+        shapes = GridIndex()
+        parents = {}
+        for n, el in enumerate(elements[1:]):
+            box = element_bbox(el)
+            if not contains(frame, box):
+                found.append(Violation("out-of-frame", name, el.get("id"),
+                                       f"{el.get('type')} {_fmt(box)} extends past frame {_fmt(frame)}"))
+            # What an element sits on is the topmost earlier shape enclosing it
+            under = shapes.containing(box)
+            parent = max(under, key=lambda c: c[0][0])[0] if under else None
+            if el.get("type") in SHAPES:
+                found.extend(self._overlaps(name, el, box, parent, shapes, parents))
+                parents[n] = parent
+                shapes.insert((n, el), box)
+            elif el.get("type") == "text" and parent is None:
+                found.extend(self._overflow(name, el, box, shapes))
+
+        self.violations.extend(found)
+        return found
+
+    def _overlaps(self, name, el, box, parent, shapes, parents):
+        # Siblings (same parent) crossing each other's edges. Nesting and
+        # layering (a modal over the page) are how the builders compose.
+        for other in shapes.query(box):
+            other_box = element_bbox(other[1])
+            if (parents[other[0]] == parent and _crossing(box, other_box)
+                    and not contains(other_box, box) and not contains(box, other_box)):
+                yield Violation("overlap", name, el.get("id"),
+                                f"{el.get('type')} {_fmt(box)} partially overlaps "
+                                f"{other[1].get('type')} {other[1].get('id')} {_fmt(other_box)}")
+
+    def _overflow(self, name, el, box, shapes):
+        # Text that no shape encloses overflows the topmost one under its first glyph
+        anchor = (box[0], box[1], box[0], box[1])
+        under = shapes.containing(anchor)
+        if under:
+            (_, owner), owner_box = max(under, key=lambda c: c[0][0])
+            yield Violation("text-overflow", name, el.get("id"),
+                            f"text {el.get('text')!r} {_fmt(box)} overflows "
+                            f"{owner.get('type')} {owner.get('id')} {_fmt(owner_box)}")
+
+    def report(self):
+        return "\n".join(f"{v.screen}: {v.kind}: {v.message}" for v in self.violations)
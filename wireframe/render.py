@@ -0,0 +1,309 @@
+# Headless previews of generated screens: one SVG tile per screen and
+# optional PNG thumbnails, drawn straight from the element fields without a
+# browser. Tiles are rendered on a process pool while the board streams past,
+# and cached by a digest of exactly the fields that get drawn, so unchanged
+# screens are copied instead of redrawn even when their ids are random.
+import collections
+import functools
+import hashlib
+import inspect
+import math
+import os
+import shutil
+import struct
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape, quoteattr
+
+from wireframe.text_metrics import LINE_HEIGHT, measure_text
+
+Shape = collections.namedtuple("Shape", "type x y width height strokeColor backgroundColor strokeWidth "
+                                        "roundness opacity text fontSize fontFamily textAlign points")
+
+FONTS = {1: "Virgil, Segoe UI Emoji", 2: "Helvetica, Arial, sans-serif", 3: "Cascadia, Consolas, monospace"}
+BACKGROUND = "#ffffff"
+MARGIN = 20
+
+def shapes(elements):
+    # The drawn fields of elements (records, views or dicts), as picklable tuples
+    return [Shape(*(el.get(field) for field in Shape._fields)) for el in elements]
+
+_VERSION = None
+
+def tile_digest(tile, scale=None):
+    # Changes with anything that changes the picture, including this renderer
+    global _VERSION
+    if _VERSION is None:
+        _VERSION = hashlib.sha256(inspect.getsource(sys.modules[__name__]).encode()).hexdigest()
+    return hashlib.sha256(f"{_VERSION}:{scale}:{tile!r}".encode()).hexdigest()[:32]
+
+def _bbox(tile):
+    boxes = []
+    for s in tile:
+        if s.points:
+            xs, ys = [p[0] for p in s.points], [p[1] for p in s.points]
+            boxes.append((s.x + min(xs), s.y + min(ys), s.x + max(xs), s.y + max(ys)))
+        else:
+            boxes.append((s.x, s.y, s.x + s.width, s.y + s.height))
+    return (min(b[0] for b in boxes) - MARGIN, min(b[1] for b in boxes) - MARGIN,
+            max(b[2] for b in boxes) + MARGIN, max(b[3] for b in boxes) + MARGIN)
+
+def _radius(s):
+    # Excalidraw's adaptive corner radius (roundness type 3)
+    if not s.roundness:
+        return 0
+    side = min(abs(s.width), abs(s.height))
+    return 32 if side > 128 else side * 0.25
+
+def _paint(color):
+    return "none" if not color or color.lstrip("#") == "transparent" else color
+
+def _lines(s):
+    return str(s.text).split("\n")
+
+# --- SVG ---
+
+def to_svg(tile):
+    x0, y0, x1, y1 = _bbox(tile)
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{x0:g} {y0:g} {x1 - x0:g} {y1 - y0:g}" '
+           f'width="{x1 - x0:g}" height="{y1 - y0:g}">',
+           f'<rect x="{x0:g}" y="{y0:g}" width="{x1 - x0:g}" height="{y1 - y0:g}" fill="{BACKGROUND}"/>']
+    for s in tile:
+        opacity = f' opacity="{s.opacity / 100:g}"' if s.opacity is not None and s.opacity < 100 else ""
+        stroke = f'stroke="{_paint(s.strokeColor)}" stroke-width="{s.strokeWidth or 1:g}"'
+        if s.type == "rectangle":
+            r = _radius(s)
+            out.append(f'<rect x="{s.x:g}" y="{s.y:g}" width="{s.width:g}" height="{s.height:g}"'
+                       + (f' rx="{r:g}"' if r else "")
+                       + f' fill="{_paint(s.backgroundColor)}" {stroke}{opacity}/>')
+        elif s.type == "ellipse":
+            out.append(f'<ellipse cx="{s.x + s.width / 2:g}" cy="{s.y + s.height / 2:g}" rx="{s.width / 2:g}" '
+                       f'ry="{s.height / 2:g}" fill="{_paint(s.backgroundColor)}" {stroke}{opacity}/>')
+        elif s.type == "line" and s.points:
+            points = " ".join(f"{s.x + p[0]:g},{s.y + p[1]:g}" for p in s.points)
+            closed = len(s.points) > 2 and list(s.points[0]) == list(s.points[-1])
+            tag, fill = ("polygon", _paint(s.backgroundColor)) if closed else ("polyline", "none")
+            out.append(f'<{tag} points="{points}" fill="{fill}" {stroke} stroke-linejoin="round"{opacity}/>')
+        elif s.type == "text":
+            anchor, x = {"center": ("middle", s.x + s.width / 2), "right": ("end", s.x + s.width)}.get(
+                s.textAlign, ("start", s.x))
+            line_height = s.fontSize * LINE_HEIGHT
+            out.append(f'<text x="{x:g}" font-family={quoteattr(FONTS.get(s.fontFamily, FONTS[1]))} '
+                       f'font-size="{s.fontSize:g}" text-anchor="{anchor}" fill="{_paint(s.strokeColor)}"{opacity}>')
+            for i, line in enumerate(_lines(s)):
+                out.append(f'<tspan x="{x:g}" y="{s.y + i * line_height + line_height * 0.8:g}">{escape(line)}</tspan>')
+            out.append("</text>")
+    out.append("</svg>\n")
+    return "\n".join(out)
+
+# --- PNG ---
+
+def _rgb(color):
+    color = (color or "").lstrip("#")
+    if len(color) == 3:
+        color = "".join(c * 2 for c in color)
+    try:
+        return bytes.fromhex(color) if len(color) == 6 else None
+    except ValueError:
+        return None
+
+@functools.lru_cache(maxsize=64)
+def _blend_tables(rgb, alpha):
+    # Per channel, every background byte mapped to its blend with rgb
+    return [bytes(round(v * (1 - alpha) + c * alpha) for v in range(256)) for c in rgb]
+
+class _Canvas:
+    # RGB raster where every shape is painted as horizontal spans, one row at a time
+    def __init__(self, box, scale):
+        self.ox, self.oy, self.scale = box[0], box[1], scale
+        self.width = max(1, math.ceil((box[2] - box[0]) * scale))
+        self.height = max(1, math.ceil((box[3] - box[1]) * scale))
+        self.pixels = bytearray(_rgb(BACKGROUND) * (self.width * self.height))
+
+    def span(self, row, x0, x1, rgb, alpha=1.0):
+        x0, x1 = max(0, round(x0)), min(self.width, round(x1))
+        if x1 <= x0 or not 0 <= row < self.height:
+            return
+        start, end = (row * self.width + x0) * 3, (row * self.width + x1) * 3
+        if alpha >= 1:
+            self.pixels[start:end] = rgb * (x1 - x0)
+            return
+        for channel, table in enumerate(_blend_tables(rgb, alpha)): # One channel at a time
+            self.pixels[start + channel:end:3] = self.pixels[start + channel:end:3].translate(table)
+
+    def fill(self, spans, top, bottom, rgb, alpha=1.0):
+        # spans(y) -> (x0, x1) or None, sampled at row centres
+        for row in range(max(0, math.floor(top)), min(self.height, math.ceil(bottom))):
+            extent = spans(row + 0.5)
+            if extent:
+                self.span(row, *extent, rgb, alpha)
+
+    def ring(self, outer, inner, top, bottom, rgb, alpha=1.0):
+        # Outline: the outer shape's spans minus the inner shape's
+        for row in range(max(0, math.floor(top)), min(self.height, math.ceil(bottom))):
+            o = outer(row + 0.5)
+            if not o:
+                continue
+            i = inner(row + 0.5)
+            if not i or i[1] <= i[0]:
+                self.span(row, *o, rgb, alpha)
+            else:
+                self.span(row, o[0], i[0], rgb, alpha)
+                self.span(row, i[1], o[1], rgb, alpha)
+
+    def polygon(self, points, rgb, alpha=1.0):
+        # Even-odd scanline fill
+        edges = list(zip(points, points[1:] + points[:1]))
+        top, bottom = min(p[1] for p in points), max(p[1] for p in points)
+        for row in range(max(0, math.floor(top)), min(self.height, math.ceil(bottom))):
+            yc = row + 0.5
+            xs = sorted(ax + (yc - ay) * (bx - ax) / (by - ay) for (ax, ay), (bx, by) in edges
+                        if (ay <= yc < by) or (by <= yc < ay))
+            for x0, x1 in zip(xs[::2], xs[1::2]):
+                self.span(row, x0, x1, rgb, alpha)
+
+    def polyline(self, points, width, rgb, alpha=1.0):
+        half = max(0.5, width / 2)
+        for (ax, ay), (bx, by) in zip(points, points[1:]):
+            steps = max(1, math.ceil(max(abs(bx - ax), abs(by - ay)) * 2))
+            for i in range(steps + 1):
+                x, y = ax + (bx - ax) * i / steps, ay + (by - ay) * i / steps
+                for row in range(math.floor(y - half + 0.5), math.floor(y + half + 0.5)):
+                    self.span(row, x - half, x + half, rgb, alpha)
+
+    def encode(self):
+        raw = b"".join(b"\x00" + bytes(self.pixels[r * self.width * 3:(r + 1) * self.width * 3])
+                       for r in range(self.height))
+        def chunk(kind, data):
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+        return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0))
+                + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+
+def _rounded(x, y, w, h, r):
+    def spans(yc):
+        if not y <= yc < y + h:
+            return None
+        d = max(y + r - yc, yc - (y + h - r), 0)
+        inset = r - math.sqrt(max(0, r * r - d * d)) if d else 0
+        return x + inset, x + w - inset
+    return spans
+
+def _oval(cx, cy, rx, ry):
+    def spans(yc):
+        t = (yc - cy) / ry if ry > 0 else 2
+        if abs(t) >= 1:
+            return None
+        half = rx * math.sqrt(1 - t * t)
+        return cx - half, cx + half
+    return spans
+
+def to_png(tile, scale=0.25):
+    # Thumbnail raster; text is drawn as greeked bars the size of each line
+    box = _bbox(tile)
+    canvas = _Canvas(box, scale)
+    def px(x, y):
+        return (x - box[0]) * scale, (y - box[1]) * scale
+    for s in tile:
+        alpha = (s.opacity if s.opacity is not None else 100) / 100
+        fill, stroke = _rgb(s.backgroundColor), _rgb(s.strokeColor)
+        width = max(1.0, (s.strokeWidth or 1) * scale)
+        if s.type in ("rectangle", "ellipse"):
+            (x, y), w, h = px(min(s.x, s.x + s.width), min(s.y, s.y + s.height)), abs(s.width) * scale, abs(s.height) * scale
+            if s.type == "rectangle":
+                r = _radius(s) * scale
+                outer, inner = _rounded(x, y, w, h, r), _rounded(x + width, y + width, w - 2 * width, h - 2 * width,
+                                                                 max(0, r - width))
+            else:
+                outer = _oval(x + w / 2, y + h / 2, w / 2, h / 2)
+                inner = _oval(x + w / 2, y + h / 2, w / 2 - width, h / 2 - width)
+            if fill:
+                canvas.fill(outer, y, y + h, fill, alpha)
+            if stroke:
+                canvas.ring(outer, inner, y, y + h, stroke, alpha)
+        elif s.type == "line" and s.points:
+            points = [px(s.x + p[0], s.y + p[1]) for p in s.points]
+            if fill and len(points) > 2 and points[0] == points[-1]:
+                canvas.polygon(points[:-1], fill, alpha)
+            if stroke:
+                canvas.polyline(points, width, stroke, alpha)
+        elif s.type == "text" and stroke:
+            line_height = s.fontSize * LINE_HEIGHT
+            for i, line in enumerate(_lines(s)):
+                w = measure_text(line, s.fontSize, s.fontFamily)[0]
+                x = {"center": s.x + (s.width - w) / 2, "right": s.x + s.width - w}.get(s.textAlign, s.x)
+                x, y = px(x, s.y + i * line_height + line_height * 0.3)
+                bar = max(1.0, s.fontSize * 0.45 * scale)
+                canvas.fill(lambda yc: (x, x + w * scale), y, y + bar, stroke, alpha * 0.6)
+    return canvas.encode()
+
+# --- Tiles ---
+
+def _store(path, data, cache_path=None):
+    for target in filter(None, (cache_path, path)):
+        with open(target + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(target + ".tmp", target)
+
+def render_tile(base, tile, scale=None, cache_dir=None):
+    # Writes base.svg (and base.png at `scale`); returns how many came from the
+    # cache and the tile's digest
+    digest = tile_digest(tile, scale)
+    hits = 0
+    formats = [(".svg", lambda: to_svg(tile).encode())]
+    if scale:
+        formats.append((".png", lambda: to_png(tile, scale)))
+    for ext, draw in formats:
+        cached = os.path.join(cache_dir, digest + ext) if cache_dir else None
+        if cached and os.path.exists(cached):
+            shutil.copyfile(cached, base + ext)
+            hits += 1
+        else:
+            _store(base + ext, draw(), cached)
+    return hits, digest
+
+class Renderer:
+    # Renders each screen of a fragment stream into out_dir/<screen>.svg|.png
+    def __init__(self, out_dir, jobs=1, png_scale=None, cache_dir=None):
+        self.out_dir, self.jobs, self.scale, self.cache_dir = out_dir, jobs, png_scale, cache_dir
+        os.makedirs(out_dir, exist_ok=True)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        self.pending = collections.deque()
+        self.tiles = 0
+        self.hits = 0
+        self.digests = set()
+
+    def render(self, names, fragments):
+        # Passes fragments through unchanged, rendering each on the side
+        for name, fragment in zip(names, fragments):
+            args = (os.path.join(self.out_dir, name), shapes(fragment), self.scale, self.cache_dir)
+            self.tiles += 1
+            if self.pool is None:
+                self._done(render_tile(*args))
+            else:
+                self.pending.append(self.pool.submit(render_tile, *args))
+                if len(self.pending) >= self.jobs * 2:
+                    self._done(self.pending.popleft().result())
+            yield fragment
+
+    def _done(self, result):
+        hits, digest = result
+        self.hits += hits
+        self.digests.add(digest)
+
+    def close(self):
+        while self.pending:
+            self._done(self.pending.popleft().result())
+        if self.pool is not None:
+            self.pool.shutdown()
+        self.prune()
+
+    def prune(self):
+        # Removes cached tiles that no screen of this run drew, as prune_cache does for fragments
+        if not self.cache_dir:
+            return
+        for name in os.listdir(self.cache_dir):
+            if os.path.splitext(name)[0] not in self.digests:
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,68 @@
+# Uniform-grid spatial index over axis-aligned bounding boxes
+import collections
+
+def element_bbox(el):
+    # (x0, y0, x1, y1) of an element dict or record; lines may run left/up from their origin
+    x, y = el.get("x"), el.get("y")
+    points = el.get("points")
+    if points:
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        return x + min(xs), y + min(ys), x + max(xs), y + max(ys)
+    w, h = el.get("width"), el.get("height")
+    return min(x, x + w), min(y, y + h), max(x, x + w), max(y, y + h)
+
+def intersects(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def contains(outer, inner, tolerance=0.5):
+    return (outer[0] - tolerance <= inner[0] and outer[1] - tolerance <= inner[1]
+            and inner[2] <= outer[2] + tolerance and inner[3] <= outer[3] + tolerance)
+
+class GridIndex:
+    # Buckets boxes into square cells so a lookup only touches nearby boxes.
+    # With boxes roughly the size of a cell, inserts and queries are O(1) each.
+
+    def __init__(self, cell_size=256):
+        self.cell_size = cell_size
+        self.items = []
+        self.boxes = []
+        self.cells = collections.defaultdict(list)
+
+    def __len__(self):
+        return len(self.items)
+
+    def _cells(self, box):
+        size = self.cell_size
+        for cx in range(int(box[0] // size), int(box[2] // size) + 1):
+            for cy in range(int(box[1] // size), int(box[3] // size) + 1):
+                yield cx, cy
+
+    def insert(self, item, box):
+        index = len(self.items)
+        self.items.append(item)
+        self.boxes.append(box)
+        for cell in self._cells(box):
+            self.cells[cell].append(index)
+        return index
+
+    def _candidates(self, box):
+        seen = set()
+        for cell in self._cells(box):
+            for index in self.cells.get(cell, ()):
+                if index not in seen:
+                    seen.add(index)
+                    yield index
+
+    def query(self, box):
+        # Items whose box overlaps `box` (touching edges don't count)
+        return [self.items[i] for i in self._candidates(box) if intersects(self.boxes[i], box)]
+
+    def within(self, box):
+        # Items lying entirely inside `box`, e.g. everything drawn in one screen's viewport
+        return [self.items[i] for i in self._candidates(box) if contains(box, self.boxes[i], 0)]
+
+    def containing(self, box):
+        # (item, box) pairs whose box encloses `box`
+        return [(self.items[i], self.boxes[i]) for i in self._candidates(box)
+                if contains(self.boxes[i], box)]
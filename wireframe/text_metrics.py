@@ -0,0 +1,106 @@
+# Text measurement for Excalidraw's built-in font families, from glyph-advance tables
+import functools
+import unicodedata
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from wireframe.trace import counted
+
+UNITS_PER_EM = 1000
+LINE_HEIGHT = 1.25 # Excalidraw's default line height for all three families
+
+# Helvetica advances (Adobe core font metrics) for ASCII 32-126
+_HELVETICA = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,  #  !"#$%&'()*+,-./
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,  # 0-9 :;<=>?
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778, # @A-O
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,  # P-Z [\]^_
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,  # `a-o
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,       # p-z {|}~
+)
+
+def _ascii_table(printable):
+    # 128 entries indexed by code point; control characters take no space
+    return (0,) * 32 + tuple(printable) + (0,)
+
+# Virgil ships no published metrics. Its hand-drawn glyphs run about 10%
+# wider than Helvetica with looser narrow letters, which this approximates.
+_VIRGIL = tuple(round(w * 1.1) if w >= 300 else w + 60 for w in _HELVETICA)
+
+ASCII_ADVANCES = {
+    1: _ascii_table(_VIRGIL),            # Virgil (hand-drawn)
+    2: _ascii_table(_HELVETICA),         # Helvetica
+    3: _ascii_table((586,) * 95),        # Cascadia Code, monospaced 1200/2048 em
+}
+FALLBACK_ADVANCE = {1: 610, 2: 556, 3: 586} # Non-ASCII letters, accents, symbols
+WIDE_ADVANCE = 1000 # Emoji and East Asian wide glyphs fill the em square
+
+def _char_advance(ch, family):
+    code = ord(ch)
+    if code < 128:
+        return ASCII_ADVANCES[family][code]
+    if unicodedata.combining(ch) or 0xFE00 <= code <= 0xFE0F or code in (0x200B, 0x200C, 0x200D):
+        return 0 # Combining marks, variation selectors (the ️ in ⚙️) and joiners
+    if code >= 0x1F000 or 0x2600 <= code <= 0x27BF or unicodedata.east_asian_width(ch) in "WF":
+        return WIDE_ADVANCE
+    return FALLBACK_ADVANCE[family]
+
+@functools.lru_cache(maxsize=None)
+def _advance_array(family):
+    return np.array(ASCII_ADVANCES[family], dtype=np.int64)
+
+@functools.lru_cache(maxsize=65536)
+def _line_units(line, family):
+    if line.isascii():
+        return sum(map(ASCII_ADVANCES[family].__getitem__, line.encode()))
+    return sum(_char_advance(ch, family) for ch in line)
+
+@functools.lru_cache(maxsize=65536)
+def _text_units(text, family):
+    # (widest line in font units, number of lines)
+    lines = text.split("\n")
+    return max(_line_units(line, family) for line in lines), len(lines)
+
+@counted
+@functools.lru_cache(maxsize=65536)
+def measure_text(text, size, family=1):
+    # (width, height) in px of `text` set at font `size`
+    units, lines = _text_units(text, family)
+    return units * size / UNITS_PER_EM, lines * size * LINE_HEIGHT
+
+def measure_texts(texts, sizes=20, family=1):
+    # measure_text over a whole column of strings in one call. With NumPy the
+    # single-line ASCII strings are measured together: their bytes are joined,
+    # looked up in the advance table at once and summed per string. Other
+    # strings take the per-character path.
+    if isinstance(sizes, (int, float)):
+        sizes = [sizes] * len(texts)
+    units = [None] * len(texts)
+    lines = [1] * len(texts)
+    if np is not None:
+        simple = [i for i, text in enumerate(texts) if text and text.isascii() and "\n" not in text]
+        if simple:
+            codes = np.frombuffer("".join(texts[i] for i in simple).encode(), dtype=np.uint8)
+            starts = np.cumsum([0] + [len(texts[i]) for i in simple[:-1]])
+            sums = np.add.reduceat(_advance_array(family)[codes], starts)
+            for i, total in zip(simple, sums.tolist()):
+                units[i] = total
+    for i, text in enumerate(texts):
+        if units[i] is None:
+            units[i], lines[i] = _text_units(text, family)
+    return [(u * size / UNITS_PER_EM, n * size * LINE_HEIGHT) for u, n, size in zip(units, lines, sizes)]
+
+def fit_text(text, width, size, family=1):
+    # `text` cut down with an ellipsis until it fits in `width` px on one line
+    limit = width * UNITS_PER_EM / size
+    if _line_units(text, family) <= limit:
+        return text
+    units = _line_units("…", family)
+    for i, ch in enumerate(text):
+        units += _char_advance(ch, family)
+        if units > limit:
+            return text[:i].rstrip() + "…"
+    return text
@@ -0,0 +1,134 @@
+# Opt-in profiling: nested timing spans, per-helper call counters and the
+# net change in live memory blocks per span (blocks allocated minus blocks
+# freed, so it can be negative), exported as Chrome trace events or a text summary.
+#
+# @traced and @counted only tag a function and hand it back unchanged, so
+# they cost nothing until Profiler.instrument() swaps the tagged functions
+# of a module for timed wrappers.
+import collections
+import contextlib
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+
+def traced(fn):
+    # Every call becomes a timing span (generators: from first step to exhaustion)
+    fn.__trace__ = "span"
+    return fn
+
+def counted(fn):
+    # Calls and cumulative time only; for hot helpers that would flood a trace
+    fn.__trace__ = "count"
+    return fn
+
+def untraced(fn):
+    # The function a Profiler wrapper stands in for (fn itself if it isn't one)
+    return getattr(fn, "__untraced__", fn)
+
+class Profiler:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+        self.spans = {} # name -> [calls, seconds, net live blocks]
+        self.calls = collections.Counter()
+        self.seconds = collections.Counter()
+        self.replaced = {} # original function -> wrapper
+
+    # --- Instrumentation ---
+
+    def instrument(self, namespace):
+        # Replaces tagged functions and methods in a module's globals
+        for name, obj in list(namespace.items()):
+            if getattr(obj, "__trace__", None):
+                namespace[name] = self.wrap(obj, name)
+            elif inspect.isclass(obj) and obj.__module__ == namespace.get("__name__"):
+                for attr, member in list(vars(obj).items()):
+                    if getattr(member, "__trace__", None):
+                        setattr(obj, attr, self.wrap(member, f"{name}.{attr}"))
+
+    def count_method(self, obj, attr, name):
+        # For callables that can't carry a tag, such as a bound rng.randint
+        setattr(obj, attr, self._counter(getattr(obj, attr), name))
+
+    def rebind(self, screens):
+        # Screen tables captured the builders before instrument() ran; lazy, as screens may be streamed
+        return ((self.replaced.get(screen[0], screen[0]),) + tuple(screen[1:]) for screen in screens)
+
+    def wrap(self, fn, name):
+        wrapper = self._span(fn, name) if fn.__trace__ == "span" else self._counter(fn, name)
+        wrapper.__untraced__ = fn
+        self.replaced[fn] = wrapper
+        return wrapper
+
+    def _span(self, fn, name):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator(*args, **kwargs):
+                with self.span(name):
+                    return (yield from fn(*args, **kwargs))
+            return generator
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            with self.span(name):
+                return fn(*args, **kwargs)
+        return call
+
+    def _counter(self, fn, name):
+        calls, seconds, clock = self.calls, self.seconds, time.perf_counter
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                seconds[name] += clock() - start
+                calls[name] += 1
+        return call
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        blocks = sys.getallocatedblocks() # Live blocks, not an allocation count
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            net_blocks = sys.getallocatedblocks() - blocks
+            self.events.append({
+                "name": name, "ph": "X", "pid": self.pid, "tid": threading.get_ident(),
+                "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6,
+                "args": dict(args, net_blocks=net_blocks),
+            })
+            stats = self.spans.setdefault(name, [0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += end - start
+            stats[2] += net_blocks
+
+    # --- Export ---
+
+    def write_chrome_trace(self, f):
+        # Load in chrome://tracing or https://ui.perfetto.dev
+        end = (time.perf_counter() - self.origin) * 1e6
+        events = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "generate_wireframe"}}]
+        events += self.events
+        events.append({"name": "helper calls", "ph": "C", "pid": self.pid, "ts": end, "args": dict(self.calls)})
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                   "otherData": {"helper_seconds": dict(self.seconds)}}, f)
+
+    def summary(self):
+        lines = [f"{'span':<36}{'calls':>8}{'total ms':>12}{'avg ms':>10}{'net live blocks':>17}"]
+        for name, (calls, seconds, net_blocks) in sorted(self.spans.items(), key=lambda s: -s[1][1]):
+            lines.append(f"{name:<36}{calls:>8}{seconds * 1e3:>12.2f}{seconds * 1e3 / calls:>10.3f}{net_blocks:>17}")
+        lines.append("")
+        lines.append(f"{'helper':<36}{'calls':>8}{'total ms':>12}{'avg us':>10}")
+        for name, calls in self.calls.most_common():
+            seconds = self.seconds[name]
+            lines.append(f"{name:<36}{calls:>8}{seconds * 1e3:>12.2f}{seconds * 1e6 / calls:>10.2f}")
+        return "\n".join(lines)
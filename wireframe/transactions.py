@@ -0,0 +1,110 @@
+# Streaming readers for transaction exports in the backend's Prisma shape
+# (id, type, accountId, expenseCategoryId, amountCents, description,
+# sourceDescription, transactionDate, plus the accountName/expenseCategoryName
+# the API adds). Exports are read record by record, so memory doesn't grow
+# with their size.
+#
+#   .csv            one transaction per row, Prisma field names as headers
+#   .jsonl/.ndjson  one JSON object per line
+#   .json           an array of transactions, or the API's
+#                   {"transactions": [...], "pagination": {...}} response
+import collections
+import csv
+import datetime
+import json
+import os
+
+from wireframe.jsonstream import Scanner
+
+def read_transactions(path):
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as f:
+        if ext == ".csv":
+            yield from csv.DictReader(f)
+        elif ext in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_transactions(f)
+
+def iter_transactions(f):
+    scanner = Scanner(f)
+    if scanner.peek() == "[":
+        yield from scanner.array()
+        return
+    scanner.expect("{")
+    if scanner.seek_key("transactions"):
+        yield from scanner.array()
+
+# --- Table rows ---
+
+def _name(record, flat, nested):
+    # accountName (API) or account.name (Prisma include); CSV exports may flatten either way
+    relation = record.get(nested)
+    if isinstance(relation, dict):
+        return record.get(flat) or relation.get("name")
+    return record.get(flat) or record.get(f"{nested}.name")
+
+def parse_date(value):
+    try:
+        return datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+def format_date(value):
+    date = parse_date(value)
+    return f"{date:%b} {date.day}" if date else str(value)
+
+def _fields(record):
+    # (income?, cents, description) of a record
+    income = str(record.get("type", "")).upper() == "INCOME"
+    cents = int(float(record.get("amountCents") or 0))
+    return income, cents, record.get("description") or record.get("sourceDescription") or ""
+
+def table_row(record):
+    # (date, description, category, account, amount, income?) as the history table shows them
+    income, cents, description = _fields(record)
+    category = _name(record, "expenseCategoryName", "expenseCategory") or record.get("expenseCategoryId")
+    account = _name(record, "accountName", "account") or record.get("accountId") or ""
+    amount = f"{'+' if income else '-'} ${abs(cents) / 100:,.2f}"
+    return (format_date(record.get("transactionDate", "")), description,
+            category or ("Income" if income else "Uncategorized"), account, amount, income)
+
+# --- Chart data ---
+
+def aggregate(records, top=5):
+    # Totals for the visualization screen in one pass over an export:
+    # ([(month, income, spent per category)], category names, [(day ordinal, balance)]).
+    # Categories beyond the `top` biggest are folded into "Others"; amounts are in dollars.
+    months = collections.defaultdict(lambda: [0, collections.Counter()]) # (year, month) -> [income, spent]
+    days = collections.Counter() # day ordinal -> net cents
+    spent = collections.Counter()
+    for record in records:
+        income, cents, _ = _fields(record)
+        date = parse_date(record.get("transactionDate", ""))
+        if date is None:
+            continue
+        month = months[date.year, date.month]
+        if income:
+            month[0] += cents
+        else:
+            category = _name(record, "expenseCategoryName", "expenseCategory") or "Uncategorized"
+            month[1][category] += cents
+            spent[category] += cents
+        days[date.toordinal()] += cents if income else -cents
+
+    categories = [name for name, _ in spent.most_common(top)]
+    others = len(spent) > top
+    monthly = []
+    for (year, month), (income, by_category) in sorted(months.items()):
+        values = [by_category[name] / 100 for name in categories]
+        if others:
+            values.append(sum(c for name, c in by_category.items() if name not in categories) / 100)
+        monthly.append((f"{datetime.date(year, month, 1):%b %y}", income / 100, tuple(values)))
+    series = []
+    balance = 0
+    for day in sorted(days):
+        balance += days[day]
+        series.append((day, balance / 100))
+    return monthly, categories + ["Others"] * others, series
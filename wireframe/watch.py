@@ -0,0 +1,317 @@
+# Warm watch mode for generate_wireframe.py: hot-reloads edited builders,
+# rebuilds only the screens whose fingerprint changed and rewrites the board
+# from encoded fragments kept in memory. Optionally serves the board over HTTP.
+import ctypes
+import ctypes.util
+import http.server
+import importlib
+import inspect
+import io
+import linecache
+import os
+import select
+import struct
+import sys
+import threading
+import time
+import traceback
+import types
+
+POLL_INTERVAL = 0.05
+DEBOUNCE = 0.02 # Editors often write a file in several steps
+
+# --- File watching ---
+
+class InotifyWatcher:
+    # Linux inotify through ctypes. Watches the parent directories so editors
+    # that save by writing a new file and renaming it are picked up too.
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+
+    def __init__(self, paths):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {os.path.abspath(p) for p in paths}
+        self.dirs = {}
+        for directory in {os.path.dirname(p) for p in self.paths}:
+            wd = libc.inotify_add_watch(self.fd, directory.encode(), self.IN_CLOSE_WRITE | self.IN_MOVED_TO)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+            self.dirs[wd] = directory
+
+    def wait(self):
+        # Blocks until watched files change and returns their paths
+        while True:
+            select.select([self.fd], [], [])
+            changed = self._drain()
+            deadline = time.monotonic() + DEBOUNCE
+            while select.select([self.fd], [], [], max(0, deadline - time.monotonic()))[0]:
+                changed |= self._drain()
+            if changed:
+                return changed
+
+    def _drain(self):
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, _mask, _cookie, length = struct.unpack_from("iIII", data, offset)
+            name = data[offset + 16:offset + 16 + length].rstrip(b"\0").decode()
+            offset += 16 + length
+            path = os.path.join(self.dirs.get(wd, ""), name)
+            if path in self.paths:
+                changed.add(path)
+        return changed
+
+class PollingWatcher:
+    # Fallback for platforms without inotify: compares mtimes every POLL_INTERVAL
+    def __init__(self, paths):
+        self.mtimes = {os.path.abspath(p): self._mtime(p) for p in paths}
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def wait(self):
+        while True:
+            time.sleep(POLL_INTERVAL)
+            changed = {p for p, m in self.mtimes.items() if self._mtime(p) != m}
+            if changed:
+                time.sleep(DEBOUNCE)
+                for path in changed:
+                    self.mtimes[path] = self._mtime(path)
+                return changed
+
+def make_watcher(paths):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths)
+
+# --- Hot reload ---
+
+class NeedsRestart(Exception):
+    # The edit can't be patched into the running module (new decorators, closures, classes...)
+    pass
+
+PLAIN_DATA = (dict, list, tuple, str, int, float, bool, type(None))
+
+def _patch_function(live, new):
+    # Swaps the code of the live function in place, so every reference to it
+    # (decorator wrappers, screen tables, pool pickles by name) sees the edit
+    live, new = inspect.unwrap(live), inspect.unwrap(new)
+    if live.__code__.co_freevars != new.__code__.co_freevars:
+        raise NeedsRestart(f"{new.__name__} changed its closure")
+    live.__code__ = new.__code__
+    live.__defaults__ = new.__defaults__
+    live.__kwdefaults__ = new.__kwdefaults__
+
+def _decorators(segment):
+    return [line.strip() for line in segment.splitlines() if line.startswith("@")]
+
+class ScriptReloader:
+    def __init__(self, module):
+        self.module = module
+        self.path = os.path.abspath(module.__file__)
+        with open(self.path) as f:
+            self.segments = module.definitions(f.read())
+
+    def reload(self):
+        # Returns the names whose definitions changed, after patching them into the module
+        with open(self.path) as f:
+            source = f.read()
+        code = compile(source, self.path, "exec")
+        segments = self.module.definitions(source)
+        scratch = {"__name__": "__wireframe_reload__", "__file__": self.path}
+        exec(code, scratch)
+
+        live = vars(self.module)
+        changed = sorted(name for name in segments if segments[name] != self.segments.get(name))
+        for name in changed:
+            new, old = scratch.get(name), live.get(name)
+            if inspect.isfunction(new) and name not in self.segments and not _decorators(segments[name]):
+                # A new plain helper: rebuild it over the live globals
+                live[name] = types.FunctionType(new.__code__, live, name, new.__defaults__, new.__closure__)
+                live[name].__kwdefaults__ = new.__kwdefaults__
+                continue
+            if not isinstance(new, PLAIN_DATA):
+                if name not in self.segments:
+                    raise NeedsRestart(f"{name} is new")
+                if _decorators(segments[name]) != _decorators(self.segments[name]):
+                    raise NeedsRestart(f"{name} changed its decorators")
+            if inspect.isfunction(new):
+                _patch_function(old, new)
+            elif inspect.isclass(new):
+                if vars(new).get("__slots__") != vars(old).get("__slots__"):
+                    raise NeedsRestart(f"{name} changed its slots")
+                for attr, member in vars(new).items():
+                    if inspect.isfunction(member):
+                        if not inspect.isfunction(vars(old).get(attr)):
+                            raise NeedsRestart(f"{name}.{attr} is new")
+                        _patch_function(vars(old)[attr], member)
+            elif isinstance(new, PLAIN_DATA) and not name.startswith("_"):
+                live[name] = new
+
+        # configure() derives FRAME_WIDTH, SIDEBAR_WIDTH, THEME... from tables such as
+        # VIEWPORTS and THEMES, so those edits only show once it runs again
+        configured = set(self.module._global_names(live["configure"].__code__)) | {"configure"}
+        if configured & set(changed):
+            settings = live["settings"]() # Before the copies below reset DETERMINISTIC, VIEWPORT...
+            for name in configured:
+                if not name.startswith("_") and isinstance(scratch.get(name), PLAIN_DATA):
+                    live[name] = scratch[name] # Tables built from other edited tables (THEMES from THEME)
+            live["configure"](**settings)
+
+        # Line numbers moved for everything below an edit; keep tracebacks and
+        # inspect.getsource (used by the screen fingerprints) pointing at the right lines
+        for name, new in scratch.items():
+            old = live.get(name)
+            if name not in changed and inspect.isfunction(new) and inspect.isfunction(old):
+                _patch_function(old, new)
+        linecache.checkcache(self.path)
+
+        # The screen table holds builder references; map them onto the live functions
+        live["SCREENS"] = [(live[screen[0].__name__],) + tuple(screen[1:]) for screen in scratch["SCREENS"]]
+        self.segments = segments
+        return changed
+
+def reload_support_module(script, path):
+    # Reloads a wireframe/ module and rebinds the names the script imported from it
+    for name, module in list(sys.modules.items()):
+        if getattr(module, "__file__", None) and os.path.abspath(module.__file__) == path:
+            linecache.checkcache(path) # Screen fingerprints hash the module source
+            fresh = importlib.reload(module)
+            live = vars(script)
+            for attr, value in list(live.items()):
+                if getattr(value, "__module__", None) == name and hasattr(fresh, attr):
+                    live[attr] = getattr(fresh, attr)
+            return name
+    return None
+
+# --- Session ---
+
+class Session:
+    def __init__(self, module, output, compact=False):
+        self.gw = module
+        self.output = output
+        self.compact = compact
+        self.fragments = {} # screen key -> encoded element texts
+        self.board = b""
+        self.generation = 0
+
+    def regenerate(self):
+        # Rebuilds the screens whose key isn't in memory and rewrites the whole board
+        gw = self.gw
+        gw.clear_components()
+        fingerprints = {}
+        keys = [gw.screen_key(screen, fingerprints) for screen in gw.SCREENS]
+        rebuilt = 0
+        fragments = {}
+        for screen, key in zip(gw.SCREENS, keys):
+            if key not in self.fragments:
+                self.fragments[key] = list(gw.encode_elements(gw.build_screen(screen), self.compact))
+                rebuilt += 1
+            fragments[key] = self.fragments[key]
+        self.fragments = fragments
+
+        buffer = io.StringIO()
+        gw.write_encoded(buffer, (text for key in keys for text in fragments[key]), self.compact)
+        self.board = buffer.getvalue().encode()
+        tmp = self.output + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.board)
+        os.replace(tmp, self.output) # Viewers never see a half-written board
+        self.generation += 1
+        return rebuilt, len(keys)
+
+class BoardHandler(http.server.BaseHTTPRequestHandler):
+    session = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/board.excalidraw"):
+            self.send_error(404)
+            return
+        etag = f'"{self.session.generation}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        board = self.session.board
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(board)))
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("ETag", etag)
+        self.send_header("Access-Control-Allow-Origin", "*") # A local Excalidraw polls from another origin
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+        self.end_headers()
+        self.wfile.write(board)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(session, port):
+    handler = type("Handler", (BoardHandler,), {"session": session})
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _watched_paths(module):
+    paths = [os.path.abspath(module.__file__)]
+    for name, mod in sys.modules.items():
+        if name.startswith("wireframe.") and getattr(mod, "__file__", None):
+            paths.append(os.path.abspath(mod.__file__))
+    return paths
+
+def run(module, output, compact=False, port=None):
+    session = Session(module, output, compact)
+    reloader = ScriptReloader(module)
+    start = time.perf_counter()
+    rebuilt, total = session.regenerate()
+    print(f"[watch] built {total} screens in {(time.perf_counter() - start) * 1000:.0f} ms -> {output}")
+    if port:
+        serve(session, port)
+        print(f"[watch] serving http://127.0.0.1:{port}/")
+
+    paths = _watched_paths(module)
+    watcher = make_watcher(paths)
+    print(f"[watch] watching {len(paths)} files ({type(watcher).__name__}), Ctrl+C to stop")
+    names = [] # Edits patched in but not yet rendered (a later step may have failed)
+    try:
+        while True:
+            changed = watcher.wait()
+            start = time.perf_counter()
+            try:
+                for path in sorted(changed):
+                    if path == reloader.path:
+                        names += reloader.reload()
+                    else:
+                        names.append(reload_support_module(module, path) or os.path.basename(path))
+                rebuilt, total = session.regenerate()
+            except NeedsRestart as e:
+                print(f"[watch] {e}; restarting")
+                os.execv(sys.executable, [sys.executable] + sys.argv)
+            except SyntaxError as e:
+                print("[watch] " + "".join(traceback.format_exception_only(e)).rstrip())
+                continue
+            except Exception:
+                # Keep the last good board until the next save fixes the error
+                traceback.print_exc()
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"[watch] {', '.join(names) or 'no changes'}: rebuilt {rebuilt} of {total} screens "
+                  f"in {elapsed:.0f} ms")
+            names = []
+    except KeyboardInterrupt:
+        pass